@@ -0,0 +1,97 @@
+"""Asset loading spread over frames.
+
+AssetLoader runs named jobs in the order they were added, a time budget's
+worth per call to pump(), so the game loop can keep drawing (the title
+screen, a progress bar) while sprites and sounds decode. A job is a
+callable; if it returns a generator, the loader steps through it, one
+step per unit of work, until it finishes, so one long job (building the
+sprite atlas) can also be spread over several frames.
+
+Jobs belong to groups, and ready(group) says whether all of a group's jobs
+have run, e.g. main() only starts play once "play" is ready while sounds
+may still be loading. mark() records named startup moments (first frame,
+interactive) relative to a start time for the startup report.
+
+A build made by bundle.py has a manifest.json next to the game, read with
+read_manifest(): its sprites are already scaled, packed into ATLAS_FILE.
+"""
+import inspect
+import json
+import time
+from collections import deque
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+ATLAS_FILE = "sprites.png"
+
+
+def read_manifest(path=MANIFEST_FILE):
+    # The bundle's manifest, or None when running from the source tree
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+class AssetLoader:
+    def __init__(self, started=None, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock() if started is None else started
+        self.jobs = deque()  # (name, group, callable or running generator)
+        self.pending = {}  # group -> jobs not finished
+        self.total = 0
+        self.finished = 0
+        self.marks = {}  # name -> seconds since started
+        self.load_time = 0.0  # seconds spent inside jobs
+
+    def add(self, name, job, group="play"):
+        self.jobs.append((name, group, job))
+        self.pending[group] = self.pending.get(group, 0) + 1
+        self.total += 1
+
+    def pump(self, budget=0.008):
+        # Runs jobs until about budget seconds have gone; True when all are done
+        clock = self.clock
+        start = clock()
+        while self.jobs and clock() - start < budget:
+            name, group, job = self.jobs[0]
+            if inspect.isgenerator(job):
+                try:
+                    next(job)
+                    continue
+                except StopIteration:
+                    pass
+            else:
+                result = job()
+                if inspect.isgenerator(result):
+                    self.jobs[0] = (name, group, result)
+                    continue
+            self.jobs.popleft()
+            self.pending[group] -= 1
+            self.finished += 1
+        self.load_time += clock() - start
+        return not self.jobs
+
+    def finish(self):
+        # Everything now, e.g. for tools that draw without a game loop
+        self.pump(float("inf"))
+
+    def ready(self, group="play"):
+        return not self.pending.get(group)
+
+    @property
+    def done(self):
+        return not self.jobs
+
+    def progress(self):
+        return self.finished / self.total if self.total else 1.0
+
+    def mark(self, name):
+        # Records the first time name happens
+        if name not in self.marks:
+            self.marks[name] = self.clock() - self.started
+        return self.marks[name]
@@ -0,0 +1,116 @@
+"""Sprite atlas: every game sprite scaled once and packed into one surface.
+
+Blitting a surface whose pixel format differs from the display's converts
+every pixel on every blit. SpriteAtlas.load scales each sprite to its game
+size, packs them all into a single surface, converts that surface to the
+display format once and hands out subsurfaces by file name, so drawing
+never converts and the sprites share one texture.
+
+With a cache_dir, the packed atlas is also written there as a PNG plus a
+JSON index keyed on the source files' sizes and modification times; the
+next start loads that one image instead of decoding and scaling every
+sprite. Call load() after pygame.display.set_mode(). load_steps() does the
+same work as a generator that yields after each sprite, for loading between
+frames (see assets.py). load_packed() loads an atlas image written by
+bundle.py, for deployed builds.
+"""
+import json
+import os
+
+import pygame
+
+CACHE_IMAGE = "sprite_atlas.png"
+CACHE_INDEX = "sprite_atlas.json"
+
+
+def pack(sizes, max_width=512):
+    # Shelf packing, tallest first; returns ({name: (x, y, w, h)}, (width, height))
+    order = sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0]))
+    rects = {}
+    x = y = shelf_height = width = 0
+    for name in order:
+        w, h = sizes[name]
+        if x + w > max_width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        rects[name] = (x, y, w, h)
+        x += w
+        width = max(width, x)
+        shelf_height = max(shelf_height, h)
+    return rects, (width, y + shelf_height)
+
+
+def source_key(sprites):
+    # Changes whenever a sprite's target size or source file changes
+    key = []
+    for filename, size in sorted(sprites.items()):
+        stat = os.stat(filename)
+        key.append([filename, list(size), stat.st_size, stat.st_mtime_ns])
+    return key
+
+
+class SpriteAtlas:
+    def __init__(self, surface, rects):
+        self.surface = surface
+        self.rects = rects
+        self.sprites = {name: surface.subsurface(rect) for name, rect in rects.items()}
+
+    def __getitem__(self, name):
+        return self.sprites[name]
+
+    @classmethod
+    def build(cls, sprites):
+        # sprites maps file name to the (width, height) it is drawn at
+        return _run(cls.build_steps(sprites))
+
+    @classmethod
+    def build_steps(cls, sprites):
+        rects, size = pack(sprites)
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        for filename, rect in rects.items():
+            surface.blit(pygame.transform.scale(pygame.image.load(filename), rect[2:]), rect[:2])
+            yield
+        return cls(surface.convert_alpha(), rects)
+
+    @classmethod
+    def load_packed(cls, image_path, rects):
+        # An atlas image written earlier, with the rects it was packed with
+        rects = {name: tuple(rect) for name, rect in rects.items()}
+        return cls(pygame.image.load(image_path).convert_alpha(), rects)
+
+    @classmethod
+    def load(cls, sprites, cache_dir=None):
+        return _run(cls.load_steps(sprites, cache_dir))
+
+    @classmethod
+    def load_steps(cls, sprites, cache_dir=None):
+        if not cache_dir:
+            return (yield from cls.build_steps(sprites))
+        image_path = os.path.join(cache_dir, CACHE_IMAGE)
+        index_path = os.path.join(cache_dir, CACHE_INDEX)
+        key = source_key(sprites)
+        try:
+            with open(index_path) as file:
+                index = json.load(file)
+            if index["key"] == key:
+                return cls.load_packed(image_path, index["rects"])
+        except (OSError, ValueError, KeyError, pygame.error):
+            pass
+        atlas = yield from cls.build_steps(sprites)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            pygame.image.save(atlas.surface, image_path)
+            with open(index_path, "w") as file:
+                json.dump({"key": key, "rects": atlas.rects}, file)
+        except (OSError, pygame.error) as e:
+            print(f"Sprite cache not written: {e}")
+        return atlas
+
+
+def _run(steps):
+    # Drives a *_steps generator to the end and returns its result
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
@@ -0,0 +1,95 @@
+"""Sound effects through a fixed budget of mixer channels.
+
+Every effect is registered by name with a priority and a minimum interval.
+play(name) is dropped if the same effect started less than its interval
+ago (several hits in one tick make one sound, not a pile of them); otherwise
+it takes a free channel, or steals the channel of the lowest-priority,
+oldest sound still playing if that one ranks no higher. An effect can also
+get a reserved channel of its own, which nothing else plays on or steals.
+
+Counters record what was played, rate limited, stolen and dropped, so audio
+behaviour under load can be checked from the profiler or a test.
+"""
+import pygame
+
+# Mixer buffer in samples. Smaller means less delay between a key press and
+# its sound (512 at 44.1 kHz is about 12 ms) but more work for the audio
+# thread; browsers pick their own, so the web build keeps a large one.
+LOW_LATENCY_BUFFER = 512
+SAFE_BUFFER = 4096
+
+
+class SoundManager:
+    def __init__(self, channels=8, clock=pygame.time.get_ticks):
+        self.clock = clock  # milliseconds
+        self.channel_count = channels
+        self.reserved = 0
+        self.effects = {}  # name -> (sound, priority, min_interval, reserved Channel or None)
+        self.last_played = {}
+        self.voices = []  # (Channel, [name, priority, started]) for shared channels
+        self.played = 0
+        self.rate_limited = 0
+        self.stolen = 0
+        self.dropped = 0
+        pygame.mixer.set_num_channels(channels)
+
+    def add(self, name, sound, priority=1, min_interval=0, reserve=False):
+        # sound may be None, e.g. when it failed to load; playing it does nothing
+        channel = None
+        if reserve:
+            channel = pygame.mixer.Channel(self.reserved)
+            self.reserved += 1
+            pygame.mixer.set_reserved(self.reserved)
+        self.effects[name] = (sound, priority, min_interval, channel)
+        # Shared channels are whatever the reservations leave
+        self.voices = [(pygame.mixer.Channel(i), [None, 0, 0])
+                       for i in range(self.reserved, self.channel_count)]
+
+    def set_sound(self, name, sound):
+        # Swap in the sound for an effect added earlier, e.g. once it has loaded
+        _, priority, min_interval, channel = self.effects[name]
+        self.effects[name] = (sound, priority, min_interval, channel)
+
+    def play(self, name):
+        sound, priority, min_interval, reserved = self.effects[name]
+        if sound is None:
+            return
+        now = self.clock()
+        last = self.last_played.get(name)
+        if last is not None and now - last < min_interval:
+            self.rate_limited += 1
+            return
+        self.last_played[name] = now
+        if reserved is not None:
+            reserved.play(sound)
+            self.played += 1
+            return
+
+        victim = None
+        for channel, voice in self.voices:
+            if not channel.get_busy():
+                victim = (channel, voice)
+                break
+            # Lowest priority first, then the one that has played longest
+            if voice[1] <= priority and (victim is None or (voice[1], voice[2]) < (victim[1][1], victim[1][2])):
+                victim = (channel, voice)
+        if victim is None:
+            self.dropped += 1
+            return
+        channel, voice = victim
+        if channel.get_busy():
+            self.stolen += 1
+        channel.play(sound)
+        voice[:] = [name, priority, now]
+        self.played += 1
+
+    def stop(self, *names):
+        for name in names:
+            sound = self.effects[name][0]
+            if sound is not None:
+                sound.stop()  # every channel playing it, reserved or not
+
+    def stats(self):
+        busy = sum(channel.get_busy() for channel, _ in self.voices)
+        return {"played": self.played, "rate_limited": self.rate_limited, "stolen": self.stolen,
+                "dropped": self.dropped, "busy": busy, "voices": len(self.voices)}
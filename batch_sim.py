@@ -0,0 +1,443 @@
+"""Vectorised Stampede rules for balancing sweeps.
+
+BatchGame advances N independent games per tick with NumPy. A lane never
+holds more than one entity (spawning claims the lane and removal frees it),
+so each game keeps its entities as one slot per lane: struct-of-arrays of
+shape (N, len(LANES)) for kind, x, speed and the hit_cowboy flag, plus a lane
+occupancy bitmask per game. The per-tick rules mirror simulation.Game.step;
+the lasso hit test reproduces pygame.Rect.clipline (SDL's integer
+Cohen-Sutherland clipper) exactly. Sounds and animation frames are not
+simulated, and randomness comes from a NumPy generator, so results match
+simulation.Game statistically rather than tick for tick.
+
+Requires NumPy, which the web build does not ship; only tools import this.
+"""
+import numpy as np
+
+from simulation import (
+    WIDTH, TOP_LIMIT, BOTTOM_LIMIT, LANES, START_LIVES, MAX_CATTLE,
+    POWER_UP_MILESTONES, SKULL_SCORE_STEP, OBSTACLE_SPAWN_INTERVAL,
+    LASSO_ORIGIN, LASSO_MAX, LASSO_STEP, LASSO_END, DODGE_AHEAD, DODGE_NEAR,
+)
+
+# Entity kinds stored per lane slot
+EMPTY, SLOW, FAST, FASTEST, POWER_UP, OBSTACLE, SKULL = range(7)
+CATTLE_KINDS = (SLOW, FAST, FASTEST)
+
+KIND_WIDTH = np.array([0, 100, 100, 100, 100, 25, 50])
+KIND_HEIGHT = np.array([0, 60, 60, 60, 60, 25, 50])
+KIND_POINTS = np.array([0, 5, 10, 15, 0, 0, 0])
+# Spawn speed is uniform in [low, high); fixed speeds have low == high
+KIND_SPEED_LOW = np.array([0.0, 2.5, 3.5, 4.5, 2.0, 2.0, 2.0])
+KIND_SPEED_HIGH = np.array([0.0, 3.5, 4.5, 5.5, 2.0, 2.0, 2.0])
+
+# Causes of a lost life, indexing BatchGame.lives_lost
+CAUSE_ESCAPED, CAUSE_OBSTACLE, CAUSE_SKULL = range(3)
+
+# Player geometry, identical to simulation.Player
+PLAYER_X = 50
+PLAYER_WIDTH = 80
+PLAYER_HEIGHT = 80
+PLAYER_SPEED = 10
+
+# Rope end y relative to the player per lasso length, truncated as clipline
+# truncates it, from the same table simulation.Player.lasso_end uses
+LASSO_END_Y = np.zeros(LASSO_MAX + LASSO_STEP + 1, dtype=np.int64)
+for _length, (_, _dy) in LASSO_END.items():
+    LASSO_END_Y[_length] = int(_dy)
+
+# Per-game arrays reported by BatchGame.results()
+RESULT_FIELDS = ("score", "lives", "play_time", "difficulty", "spawned_milestones",
+                 "lassoed", "power_ups_caught", "lives_lost")
+# Every per-game array, all of which compact() shrinks together
+STATE_FIELDS = RESULT_FIELDS + (
+    "spawn_timer", "obstacle_spawn_timer", "last_skull_score", "lane_mask", "player_y",
+    "lassolength", "lasso_active", "kind", "x", "speed", "hit_cowboy", "game_id")
+
+LANE_Y = np.array(LANES)
+LANE_BITS = np.left_shift(1, np.arange(len(LANES)), dtype=np.int64)
+
+
+def _cdiv(a, b):
+    # C integer division, truncating toward zero
+    q = np.abs(a) // np.abs(b)
+    return np.where((a < 0) != (b < 0), -q, q)
+
+
+def _outcode(x, y, rx1, ry1, rx2, ry2):
+    return ((y < ry1) * 2 | (y > ry2) * 4 | (x < rx1) * 1 | (x > rx2) * 8)
+
+
+def clipline_hits(rx, ry, w, h, x1, y1, x2, y2):
+    """Vectorised bool(pygame.Rect(rx, ry, w, h).clipline((x1, y1), (x2, y2))).
+
+    All arguments are integer arrays (pygame truncates float coordinates
+    before clipping). Lines must satisfy x1 < x2 and y1 < y2, which always
+    holds for the lasso, so SDL's horizontal and vertical shortcuts never
+    apply.
+    """
+    rx1, ry1 = rx, ry
+    rx2, ry2 = rx + w - 1, ry + h - 1
+    x1, y1, x2, y2 = (np.array(v, dtype=np.int64) for v in (x1, y1, x2, y2))
+    c1 = _outcode(x1, y1, rx1, ry1, rx2, ry2)
+    c2 = _outcode(x2, y2, rx1, ry1, rx2, ry2)
+    hit = np.zeros(x1.shape, dtype=bool)
+    active = np.ones(x1.shape, dtype=bool)
+    while active.any():
+        rejected = active & ((c1 & c2) != 0)
+        accepted = active & ~rejected & (c1 == 0) & (c2 == 0)
+        hit |= accepted
+        active &= ~(rejected | accepted)
+        if not active.any():
+            break
+        # Clip whichever end is still outside, start point first
+        first = active & (c1 != 0)
+        code = np.where(first, c1, c2)
+        dx = x2 - x1
+        dy = y2 - y1
+        clip_y = (code & 6) != 0
+        y = np.where(code & 2, ry1, ry2)
+        x = np.where(code & 1, rx1, rx2)
+        new_x = np.where(clip_y, x1 + _cdiv(dx * (y - y1), np.where(dy == 0, 1, dy)), x)
+        new_y = np.where(clip_y, y, y1 + _cdiv(dy * (x - x1), np.where(dx == 0, 1, dx)))
+        second = active & ~first
+        x1 = np.where(first, new_x, x1)
+        y1 = np.where(first, new_y, y1)
+        x2 = np.where(second, new_x, x2)
+        y2 = np.where(second, new_y, y2)
+        c1 = np.where(first, _outcode(x1, y1, rx1, ry1, rx2, ry2), c1)
+        c2 = np.where(second, _outcode(x2, y2, rx1, ry1, rx2, ry2), c2)
+    return hit
+
+
+# N concurrent games sharing one set of rules, advanced together per tick
+class BatchGame:
+    def __init__(self, n, seed=None, max_cattle=MAX_CATTLE, milestones=POWER_UP_MILESTONES,
+                 skull_step=SKULL_SCORE_STEP, obstacle_interval=OBSTACLE_SPAWN_INTERVAL,
+                 start_difficulty=1.0, max_difficulty=2.5, difficulty_step=0.01):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.max_cattle = max_cattle
+        self.milestones = list(milestones)  # same order simulation.Game checks them in
+        self.skull_step = skull_step
+        self.obstacle_interval = obstacle_interval
+        self.start_difficulty = start_difficulty
+        self.max_difficulty = max_difficulty
+        self.difficulty_step = difficulty_step
+        lanes = len(LANES)
+
+        # Per-game state
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.full(n, START_LIVES, dtype=np.int64)
+        self.play_time = np.zeros(n, dtype=np.int64)
+        self.spawn_timer = np.zeros(n, dtype=np.int64)
+        self.obstacle_spawn_timer = np.zeros(n, dtype=np.int64)
+        self.difficulty = np.full(n, start_difficulty)
+        self.last_skull_score = np.zeros(n, dtype=np.int64)
+        self.spawned_milestones = np.zeros((n, len(self.milestones)), dtype=bool)
+        self.lane_mask = np.zeros(n, dtype=np.int64)
+        self.player_y = np.full(n, (TOP_LIMIT + BOTTOM_LIMIT) // 2, dtype=np.int64)
+        self.lassolength = np.zeros(n, dtype=np.int64)
+        self.lasso_active = np.zeros(n, dtype=bool)
+
+        # Per-lane entity slots
+        self.kind = np.zeros((n, lanes), dtype=np.int8)
+        self.x = np.zeros((n, lanes))
+        self.speed = np.zeros((n, lanes))
+        self.hit_cowboy = np.zeros((n, lanes), dtype=bool)
+
+        # Outcome counters
+        self.lassoed = np.zeros((n, len(CATTLE_KINDS)), dtype=np.int64)
+        self.power_ups_caught = np.zeros(n, dtype=np.int64)
+        self.lives_lost = np.zeros((n, 3), dtype=np.int64)
+
+        # Finished games are compacted out of the arrays above; game_id maps
+        # each remaining row back to its index in results()
+        self.game_id = np.arange(n)
+        self._results = {name: getattr(self, name).copy() for name in RESULT_FIELDS}
+
+    @property
+    def alive(self):
+        return self.lives > 0
+
+    def occupancy(self):
+        # (N, lanes) bool view of the lane bitmask
+        return (self.lane_mask[:, None] & LANE_BITS) != 0
+
+    def _spawn(self, games, kinds):
+        # Put one entity of kinds[i] into a random free lane of games[i].
+        # Returns the subset of games that had a free lane.
+        free = (self.lane_mask[games, None] & LANE_BITS) == 0
+        has_free = free.any(axis=1)
+        games, kinds, free = games[has_free], kinds[has_free], free[has_free]
+        if len(games):
+            keys = np.where(free, self.rng.random(free.shape), -1.0)
+            lanes = keys.argmax(axis=1)
+            low, high = KIND_SPEED_LOW[kinds], KIND_SPEED_HIGH[kinds]
+            self.kind[games, lanes] = kinds
+            self.x[games, lanes] = WIDTH
+            self.speed[games, lanes] = low + (high - low) * self.rng.random(len(games))
+            self.hit_cowboy[games, lanes] = False
+            self.lane_mask[games] |= LANE_BITS[lanes]
+        return games
+
+    def _remove(self, games, lanes):
+        # games may repeat, so the bitmask update has to be unbuffered
+        self.kind[games, lanes] = EMPTY
+        self.hit_cowboy[games, lanes] = False
+        np.bitwise_and.at(self.lane_mask, games, ~LANE_BITS[lanes])
+
+    def step(self, up, down, lasso):
+        alive = self.alive
+        self.play_time += alive
+        play_time = self.play_time
+
+        # Cattle spawning
+        self.spawn_timer += alive
+        spawn_rate = np.maximum(30, (60 / self.difficulty).astype(np.int64))
+        games = np.flatnonzero(alive & (self.spawn_timer >= spawn_rate))
+        if len(games):
+            kind = self.kind[games]
+            games = games[((kind >= SLOW) & (kind <= FASTEST)).sum(axis=1) < self.max_cattle]
+        if len(games):
+            roll = self.rng.random(len(games))
+            t = play_time[games]
+            fastest_chance = np.where(t > 1800, np.minimum(0.3, 0.1 + 0.2 * (t - 1800) / 1800), 0.1)
+            fast_chance = np.where(t > 900, np.minimum(0.4, 0.4 * np.maximum(0, t - 900) / 900), 0.0)
+            late = self.score[games] >= 400
+            kinds = np.where(
+                late,
+                np.where(roll < fastest_chance, FASTEST,
+                         np.where(roll < fastest_chance + 0.4, FAST, SLOW)),
+                np.where(roll < fast_chance, FAST, SLOW))
+            self._spawn(games, kinds)
+            self.spawn_timer[games] = 0
+            self.difficulty[games] = np.minimum(self.difficulty[games] + self.difficulty_step,
+                                                self.max_difficulty)
+
+        # Power-ups at score milestones
+        for i, milestone in enumerate(self.milestones):
+            games = np.flatnonzero(alive & (self.score >= milestone) & ~self.spawned_milestones[:, i])
+            if len(games):
+                spawned = self._spawn(games, np.full(len(games), POWER_UP))
+                self.spawned_milestones[spawned, i] = True
+
+        # Obstacles on a fixed timer
+        self.obstacle_spawn_timer += alive
+        games = np.flatnonzero(alive & (self.obstacle_spawn_timer >= self.obstacle_interval))
+        if len(games):
+            self._spawn(games, np.full(len(games), OBSTACLE))
+            self.obstacle_spawn_timer[games] = 0
+
+        # A skull every skull_step points, once the last one has cleared the edge
+        games = np.flatnonzero(alive & (self.score >= self.last_skull_score + self.skull_step))
+        if len(games):
+            near_edge = ((self.kind[games] == SKULL) & (self.x[games] > WIDTH - 100)).any(axis=1)
+            games = games[~near_edge]
+            spawned = self._spawn(games, np.full(len(games), SKULL))
+            self.last_skull_score[spawned] = self.score[spawned]
+
+        # Player movement and lasso
+        py = self.player_y
+        py -= PLAYER_SPEED * (alive & up & (py > TOP_LIMIT))
+        py += PLAYER_SPEED * (alive & down & (py < BOTTOM_LIMIT - PLAYER_HEIGHT))
+        throw = alive & lasso & (self.lassolength == 0)
+        self.lassolength[throw] = 1
+        self.lasso_active |= throw
+        extending = alive & self.lasso_active
+        grow = extending & (self.lassolength < LASSO_MAX)
+        retract = extending & ~grow
+        self.lassolength += LASSO_STEP * grow
+        self.lassolength[retract] = 0
+        self.lasso_active &= ~retract
+
+        # Entity movement. Empty slots and finished games drift too, which is
+        # cheaper than masking them; nothing below reads them.
+        self.x += np.where(self.hit_cowboy, self.speed * 5, -self.speed)
+        self.hit_cowboy &= self.x < WIDTH
+
+        # Lasso hits on cattle and power-ups, for games with the lasso out
+        games = np.flatnonzero(alive & (self.lassolength > 0))
+        if len(games):
+            length = self.lassolength[games, None]
+            left = np.trunc(self.x[games]).astype(np.int64)
+            kind = self.kind[games]
+            # Broad phase on x before the exact clip test
+            reach = ((kind >= SLOW) & (kind <= POWER_UP)
+                     & (left <= PLAYER_X + PLAYER_WIDTH + length)
+                     & (left + KIND_WIDTH[kind] > PLAYER_X + PLAYER_WIDTH))
+            rows, lanes = np.nonzero(reach)
+            if len(rows):
+                g = games[rows]
+                length = self.lassolength[g]
+                start_y = py[g] + LASSO_ORIGIN[1]
+                end_y = py[g] + LASSO_END_Y[length]
+                k = kind[rows, lanes]
+                hit = clipline_hits(
+                    left[rows, lanes], LANE_Y[lanes], KIND_WIDTH[k], KIND_HEIGHT[k],
+                    np.full(len(g), PLAYER_X + PLAYER_WIDTH), start_y,
+                    PLAYER_X + PLAYER_WIDTH + length, end_y)
+                g, lanes, k = g[hit], lanes[hit], k[hit]
+                cattle = k != POWER_UP
+                np.add.at(self.score, g[cattle], KIND_POINTS[k[cattle]])
+                np.add.at(self.lassoed, (g[cattle], k[cattle] - SLOW), 1)
+                np.add.at(self.lives, g[~cattle], 1)
+                np.add.at(self.power_ups_caught, g[~cattle], 1)
+                self._remove(g, lanes)
+
+        # Player collisions and entities leaving the field; all of these need
+        # the entity's left edge past the player's right edge
+        g, lanes = np.nonzero((self.x < PLAYER_X + PLAYER_WIDTH) & (self.kind != EMPTY))
+        keep = alive[g]
+        g, lanes = g[keep], lanes[keep]
+        if len(g):
+            k = self.kind[g, lanes]
+            x = self.x[g, lanes]
+            width, height = KIND_WIDTH[k], KIND_HEIGHT[k]
+            lane_y = LANE_Y[lanes]
+            player_y = py[g]
+            overlaps_y = (lane_y < player_y + PLAYER_HEIGHT) & (lane_y + height > player_y)
+            touches_player = overlaps_y & (x + width > PLAYER_X)
+            cattle = k <= FASTEST
+            charging = cattle & ~self.hit_cowboy[g, lanes]
+            bump = charging & overlaps_y
+            self.hit_cowboy[g[bump], lanes[bump]] = True
+            escaped = charging & ~bump & (x < 0)
+            crashed_obstacle = (k == OBSTACLE) & touches_player
+            crashed_skull = (k == SKULL) & touches_player
+            off_screen = ~cattle & (x < -width) & ~crashed_obstacle & ~crashed_skull
+            for cause, lost in ((CAUSE_ESCAPED, escaped), (CAUSE_OBSTACLE, crashed_obstacle),
+                                (CAUSE_SKULL, crashed_skull)):
+                np.add.at(self.lives_lost[:, cause], g[lost], 1)
+                np.subtract.at(self.lives, g[lost], 1)
+            gone = escaped | crashed_obstacle | crashed_skull | off_screen
+            self._remove(g[gone], lanes[gone])
+
+    def compact(self):
+        # Drop finished games from the per-tick arrays so later ticks only
+        # pay for the games still running
+        alive = self.alive
+        done = self.game_id[~alive]
+        for name in RESULT_FIELDS:
+            self._results[name][done] = getattr(self, name)[~alive]
+        for name in STATE_FIELDS:
+            setattr(self, name, getattr(self, name)[alive])
+
+    def results(self):
+        # Per-game outcome arrays indexed by original game number
+        for name in RESULT_FIELDS:
+            self._results[name][self.game_id] = getattr(self, name)
+        return {name: values.copy() for name, values in self._results.items()}
+
+    def run(self, policy=None, max_ticks=60 * 60 * 10):
+        # Step until every game is over or max_ticks have run.
+        # policy(batch) returns (up, down, lasso) bool arrays, one per live row.
+        ticks = 0
+        while ticks < max_ticks and len(self.game_id):
+            if policy is None:
+                idle = np.zeros(len(self.game_id), dtype=bool)
+                self.step(idle, idle, idle)
+            else:
+                self.step(*policy(self))
+            ticks += 1
+            # Compacting costs a copy of every array, so wait for enough dead rows
+            if (~self.alive).sum() * 4 > len(self.game_id):
+                self.compact()
+        return ticks
+
+
+# Scripted player for sweeps: line up with the nearest lassoable target and throw
+def chase_policy(batch):
+    targets = ((batch.kind >= SLOW) & (batch.kind <= POWER_UP) & ~batch.hit_cowboy
+               & (batch.x > PLAYER_X + PLAYER_WIDTH))
+    nearest_x = np.where(targets, batch.x, np.inf)
+    lane = nearest_x.argmin(axis=1)
+    has_target = targets.any(axis=1)
+    # Aim the middle of the lasso's sweep at the middle of the target lane
+    aim = batch.player_y + 25
+    want = LANE_Y[lane] + 30
+    up = has_target & (aim > want + 5)
+    down = has_target & (aim < want - 5)
+    lasso = has_target & (np.abs(aim - want) < 40)
+    return up, down, lasso
+
+
+# Every position the cowboy can stand at, as simulation.dodge_policy chooses
+# among. dodge_policy keeps a set of them as a bitmask, bit i for PLAYER_Y[i].
+PLAYER_Y = np.arange(TOP_LIMIT, BOTTOM_LIMIT - PLAYER_HEIGHT + 1, PLAYER_SPEED)
+ALL_POSITIONS = (1 << len(PLAYER_Y)) - 1
+
+
+def _position_bits(top, bottom):
+    # Bitmask of the positions where the cowboy overlaps rows [top, bottom)
+    overlaps = (top < PLAYER_Y + PLAYER_HEIGHT) & (bottom > PLAYER_Y)
+    return int((overlaps * (1 << np.arange(len(PLAYER_Y)))).sum())
+
+
+# BLOCKS[kind, lane]: the positions a hazard of that kind in that lane rules out
+BLOCKS = np.array([[_position_bits(y, y + KIND_HEIGHT[kind]) if kind >= OBSTACLE else 0
+                    for y in LANES] for kind in range(len(KIND_WIDTH))], dtype=np.int64)
+
+
+def _highest_bit(bits):
+    # Index of the highest set bit of each mask, -1 for 0; masks are below
+    # 2**53, so frexp's exponent is exact
+    return np.frexp(bits.astype(np.float64))[1].astype(np.int64) - 1
+
+
+def _lowest_bit(bits):
+    return _highest_bit(bits & -bits)
+
+
+# simulation.dodge_policy for a batch: chase_policy's target, but only where
+# no obstacle or skull is coming, and never across one about to arrive. Each
+# game's hazards and choices are bitmasks over PLAYER_Y, so the per-tick work
+# is a few (N,) arrays and the hazards in range, not an array per lane and
+# position. Runs still cost more than with chase_policy: about 1.3-1.5M
+# game-ticks/s for 20k-100k games against 1.9-2.1M on one core.
+def dodge_policy(batch):
+    front = PLAYER_X + PLAYER_WIDTH
+    kind, x = batch.kind, batch.x
+    # Hazards are few, so only the ones within DODGE_AHEAD are gathered
+    rows, lanes = np.nonzero((kind >= OBSTACLE) & (x < front + DODGE_AHEAD))
+    k, hazard_x = kind[rows, lanes], x[rows, lanes]
+    passing = hazard_x + KIND_WIDTH[k] > PLAYER_X
+    rows, lanes, k, hazard_x = rows[passing], lanes[passing], k[passing], hazard_x[passing]
+    blocks = BLOCKS[k, lanes]
+    ahead = np.zeros(len(kind), dtype=np.int64)
+    np.bitwise_or.at(ahead, rows, blocks)
+    close = hazard_x < front + DODGE_NEAR
+    near = np.zeros(len(kind), dtype=np.int64)
+    np.bitwise_or.at(near, rows[close], blocks[close])
+
+    # How far the cowboy can go either way without crossing a near hazard
+    py = batch.player_y
+    current = (py - TOP_LIMIT) // PLAYER_SPEED
+    low = _highest_bit(near & ((1 << current) - 1)) + 1
+    above = near >> (current + 1)
+    high = np.where(above != 0, current + _lowest_bit(above), len(PLAYER_Y) - 1)
+    options = ((1 << (high + 1)) - (1 << low)) & ~ahead
+    options = np.where(options != 0, options, ALL_POSITIONS & ~near)
+    options = np.where(options != 0, options, 1 << current)
+
+    targets = ((kind >= SLOW) & (kind <= POWER_UP) & ~batch.hit_cowboy & (x > front))
+    lane = np.where(targets, x, np.inf).argmin(axis=1)
+    has_target = targets.any(axis=1)
+    # Aim the middle of the lasso's sweep at the middle of the target lane:
+    # the closest option at or below want and the closest at or above, then
+    # whichever is nearer, or nearer the cowboy on a tie, or the lower one
+    want = np.where(has_target, LANE_Y[lane] + 5, py)
+    floor = np.minimum((want - TOP_LIMIT) // PLAYER_SPEED, len(PLAYER_Y) - 1)
+    below = _highest_bit(np.where(floor >= 0, options & ((2 << np.maximum(floor, 0)) - 1), 0))
+    ceil = np.maximum(-((TOP_LIMIT - want) // PLAYER_SPEED), 0)
+    rest = np.where(ceil < len(PLAYER_Y), options >> np.minimum(ceil, len(PLAYER_Y)), 0)
+    upper = np.where(rest != 0, ceil + _lowest_bit(rest), -1)
+    y_below = TOP_LIMIT + PLAYER_SPEED * below
+    y_upper = TOP_LIMIT + PLAYER_SPEED * upper
+    cost_below = np.abs(y_below - want) * 1000 + np.abs(y_below - py)
+    cost_upper = np.abs(y_upper - want) * 1000 + np.abs(y_upper - py)
+    take_upper = (below < 0) | ((upper >= 0) & (cost_upper < cost_below))
+    goal = np.where(take_upper, y_upper, y_below)
+    aim = py + 25
+    lasso = has_target & (np.abs(aim - (LANE_Y[lane] + 30)) < 40)
+    return goal < py, goal > py, lasso
@@ -0,0 +1,311 @@
+"""Benchmarks for the update and render hot paths.
+
+    python bench.py                       run everything, compare with bench_baseline.json
+    python bench.py --save                run and store the results as the new baseline
+    python bench.py --only lasso_draw hud_text
+
+Runs with SDL's dummy video and audio drivers, so no window opens. Each
+benchmark is timed over several rounds; the report gives the median, mean,
+standard deviation and range of the per-round rate (ticks/s for simulation,
+frames/s for rendering). With a baseline present, any benchmark whose median
+drops more than --tolerance below the baseline median is flagged and the
+exit status is 1, so this can gate a deploy. Baselines are per machine:
+create one with --save on the hardware you compare on, and recreate it
+whenever a benchmark's scene changes. The file is not kept in git.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# main.py loads its assets relative to the working directory
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import simulation
+from simulation import LANES, Game, Inputs
+
+DEFAULT_BASELINE = "bench_baseline.json"
+
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, iterations):
+    # Registers fn(iterations) -> units of work done; one call is one timed round
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit, iterations)
+        return fn
+    return register
+
+
+# The cowboy's lane and the lanes either side, the only ones his rows and
+# the lasso cross while he stands in the middle one
+NEAR_LANES = LANES[2:5]
+# Entities start between the cowboy's front and a little past the lasso's
+# longest reach (x = 311), so they arrive at different ticks of a round
+NEAR_X = range(140, 440)
+# Ten pixels above the middle lane, so the lasso crosses the lane above too:
+# entities there are tested every tick the lasso passes them, though only
+# the part of it left of x = 190 is high enough to catch them
+PLAYER_Y = NEAR_LANES[1] - 10
+
+
+def worst_case_game():
+    # More entities than lane rules ever allow at once: 8 cattle across the
+    # tiers plus two of each other kind, crowded into the cowboy's rows in
+    # or just past the lasso's reach, so through a round the lasso keeps catching,
+    # cattle keep bouncing off the cowboy and obstacles and skulls keep
+    # crashing into him. Each round builds a fresh scene.
+    game = Game(seed=0)
+    kinds = ["slow", "fast", "fastest"]
+    for i in range(8):
+        cattle = game.pools[kinds[i % 3]].acquire(NEAR_LANES[i % 3], 3.0 + i % 3)
+        cattle.x = NEAR_X[36 * i]
+        game.place(cattle)
+    for i, kind in enumerate(("power_up", "power_up", "obstacle", "obstacle", "skull", "skull")):
+        entity = game.pools[kind].acquire(NEAR_LANES[i // 2 % 3], 2)
+        entity.x = NEAR_X[20 * i + 10]
+        game.place(entity)
+    game.lanes.mask = game.lanes.full  # so no spawn finds a free lane
+    game.player.y = PLAYER_Y
+    return game
+
+
+# Lasso held, so it is thrown again as soon as it comes back
+LASSO_HELD = Inputs(lasso=True)
+
+
+@benchmark("entity_update", "ticks/s", 60)
+def bench_entity_update(iterations):
+    game = worst_case_game()
+    step = game.step
+    for _ in range(iterations):
+        step(LASSO_HELD)
+    return iterations
+
+
+def crowd_game(lanes, x):
+    # 256 entities, far more than the lanes allow, spread over lanes with
+    # the i-th at x(i)
+    game = Game(seed=0)
+    kinds = ["slow", "fast", "fastest", "power_up", "obstacle", "skull"]
+    for i in range(256):
+        entity = game.pools[kinds[i % len(kinds)]].acquire(lanes[i % len(lanes)], 1.0)
+        entity.x = x(i)
+        game.place(entity)
+    game.player.y = PLAYER_Y
+    return game
+
+
+@benchmark("crowd_update", "ticks/s", 60)
+def bench_crowd_update(iterations):
+    # Far more entities than the lanes allow, all in the cowboy's rows and
+    # in or near the lasso's reach, to see how collisions scale
+    step = crowd_game(NEAR_LANES, lambda i: NEAR_X[i * 7 % len(NEAR_X)]).step
+    for _ in range(iterations):
+        step(LASSO_HELD)
+    return iterations
+
+
+@benchmark("crowd_update_far", "ticks/s", 60)
+def bench_crowd_update_far(iterations):
+    # The same crowd across every lane and right of the lasso's reach: the
+    # cost of moving entities that no collision query visits
+    step = crowd_game(LANES, lambda i: 400 + i).step
+    for _ in range(iterations):
+        step(LASSO_HELD)
+    return iterations
+
+
+@benchmark("headless_session", "ticks/s", 3)
+def bench_headless_session(iterations):
+    # Whole seeded sessions with the scripted player, capped at 5 minutes each
+    ticks = 0
+    for seed in range(iterations):
+        ticks += simulation.run(Game(seed=seed), simulation.chase_policy, 60 * 60 * 5)
+    return ticks
+
+
+@benchmark("headless_session_30hz", "ticks/s", 3)
+def bench_headless_session_30hz(iterations):
+    # As headless_session with two frames a step and swept collision
+    ticks = 0
+    for seed in range(iterations):
+        ticks += simulation.run(Game(seed=seed, tick_scale=2), simulation.chase_policy, 60 * 60 * 5)
+    return ticks
+
+
+@benchmark("snapshot_restore", "round trips/s", 200)
+def bench_snapshot_restore(iterations):
+    # Save and restore the worst-case scene, as a rewind or a fork would
+    game = worst_case_game()
+    for _ in range(iterations):
+        game.restore(game.snapshot())
+    return iterations
+
+
+def render_benchmarks():
+    import main
+
+    main.bootstrap()
+    main.ASSETS.finish()  # sprites normally load between frames
+    screen = main.screen
+
+    @benchmark("background_blit", "frames/s", 200)
+    def bench_background_blit(iterations):
+        for _ in range(iterations):
+            screen.blit(main.BACKGROUND, (0, 0))
+        return iterations
+
+    @benchmark("lasso_draw", "frames/s", 200)
+    def bench_lasso_draw(iterations):
+        game = Game(seed=0)
+        player = game.player
+        player.lassolength = 181  # longest the lasso gets: 1 + 12 steps of 15
+        for _ in range(iterations):
+            main.draw_player(player, "play")
+        return iterations
+
+    font = main.pygame.font.Font(None, 36)
+    hud = main.Hud(font, main.TEXT_CACHE, main.WIDTH, main.WHITE)
+
+    @benchmark("hud_text", "frames/s", 200)
+    def bench_hud_text(iterations):
+        # Steady state: values change a few times a minute
+        for _ in range(iterations):
+            hud.draw(screen, 120, 450, 3)
+        return iterations
+
+    @benchmark("hud_text_changing", "frames/s", 200)
+    def bench_hud_text_changing(iterations):
+        # Worst case: a new score every frame
+        for i in range(iterations):
+            hud.draw(screen, i, 450, 3)
+        return iterations
+
+    @benchmark("play_frame", "frames/s", 60)
+    def bench_play_frame(iterations):
+        # Update plus the full blit pass for the worst-case scene
+        game = worst_case_game()
+        for _ in range(iterations):
+            game.step(LASSO_HELD)
+            screen.blit(main.BACKGROUND, (0, 0))
+            main.draw_player(game.player, "play")
+            for entity in game.entities():
+                main.draw_entity(entity)
+            hud.draw(screen, game.score, game.high_score, game.lives)
+            main.pygame.display.flip()
+        return iterations
+
+    @benchmark("play_frame_dirty", "frames/s", 60)
+    def bench_play_frame_dirty(iterations):
+        # As play_frame, restoring and updating only the changed rects
+        game = worst_case_game()
+        dirty = main.DirtyRects(screen, main.BACKGROUND)
+        for _ in range(iterations):
+            game.step(LASSO_HELD)
+            dirty.clear()
+            dirty.add(main.draw_player(game.player, "play"))
+            for entity in game.entities():
+                dirty.add(main.draw_entity(entity))
+            dirty.add(hud.draw(screen, game.score, game.high_score, game.lives))
+            dirty.present()
+        return iterations
+
+    @benchmark("play_frame_parallax", "frames/s", 60)
+    def bench_play_frame_parallax(iterations):
+        # As play_frame_dirty with the fence bands scrolling every frame
+        game = worst_case_game()
+        dirty = main.DirtyRects(screen, main.BACKGROUND, layers=main.PARALLAX)
+        for _ in range(iterations):
+            game.step(LASSO_HELD)
+            main.PARALLAX.scroll(main.GROUND_SPEED * game.difficulty)
+            dirty.clear(0.5)
+            dirty.add(main.draw_player(game.player, "play"))
+            for entity in game.entities():
+                dirty.add(main.draw_entity(entity))
+            dirty.add(hud.draw(screen, game.score, game.high_score, game.lives))
+            dirty.present()
+        return iterations
+
+
+def run_benchmark(name, rounds):
+    fn, unit, iterations = BENCHMARKS[name]
+    fn(iterations)  # warm up caches and lazy initialisation
+    rates = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        work = fn(iterations)
+        rates.append(work / (time.perf_counter() - started))
+    return {
+        "unit": unit,
+        "rounds": rounds,
+        "median": statistics.median(rates),
+        "mean": statistics.fmean(rates),
+        "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+        "min": min(rates),
+        "max": max(rates),
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Names of benchmarks whose median fell more than tolerance below baseline
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and result["median"] < base["median"] * (1 - tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Stampede's update and render paths.")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks to run")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown of the median before failing (default 0.15)")
+    parser.add_argument("--no-render", action="store_true", help="skip benchmarks that need main.py")
+    args = parser.parse_args(argv)
+
+    if not args.no_render:
+        render_benchmarks()
+    names = args.only or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}; have {', '.join(BENCHMARKS)}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    for name in names:
+        result = results[name] = run_benchmark(name, args.rounds)
+        line = (f"{name:22} {result['median']:12.0f} {result['unit']:9} "
+                f"mean {result['mean']:.0f} ± {result['stdev']:.0f}  "
+                f"[{result['min']:.0f} .. {result['max']:.0f}]")
+        base = baseline.get(name)
+        if base:
+            line += f"  {result['median'] / base['median'] - 1:+.1%} vs baseline"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
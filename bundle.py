@@ -0,0 +1,204 @@
+"""Builds a deployable asset bundle for one platform.
+
+    python bundle.py web                  dist/web, then: pygbag --build dist/web
+    python bundle.py desktop              dist/desktop, a directory to run main.py from
+    python bundle.py web --rate 16000
+
+The source tree ships every sprite at its original size and every sound as
+both .wav and .ogg. A bundle holds only what its platform loads: the game's
+modules, the background and title cowboy at their drawn sizes, every other
+sprite scaled and packed into one atlas image (see atlas.py), and each sound
+effect in the platform's format (main.SOUND_EXTS), downsampled to mono at
+--rate. The sprite list, sound names and formats come from main.py's own
+tables, so a sprite added there is bundled without touching this script.
+
+manifest.json lists the atlas rects and each asset's size and SHA-256, so
+two builds can be compared file by file; main.py takes its presence to mean
+the images need no scaling (see assets.read_manifest). pygbag packs the
+whole directory into one .apk, so the browser downloads and caches it as a
+single file.
+
+Each build replaces the output directory, so files from an earlier build
+never reach the package; an existing --out that is not a bundle is left
+alone and reported.
+
+Encoding .ogg needs ffmpeg on the PATH; without it the web bundle copies the
+shipped .ogg files unchanged.
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+
+from assets import ATLAS_FILE, MANIFEST_FILE, MANIFEST_VERSION
+
+# Kept apart from pygbag's own output, which goes to build/ under the game
+DEFAULT_OUT = "dist"
+
+
+def png_bytes(surface):
+    import pygame
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "image.png")
+        pygame.image.save(surface, path)
+        with open(path, "rb") as file:
+            return file.read()
+
+
+def downsample(filename, rate):
+    # 16-bit mono WAV bytes of filename at rate; the mixer does the resampling
+    import pygame
+
+    pygame.mixer.quit()
+    pygame.mixer.init(frequency=rate, size=-16, channels=1)
+    raw = pygame.mixer.Sound(filename).get_raw()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sound.wav")
+        with wave.open(path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(rate)
+            out.writeframes(raw)
+        with open(path, "rb") as file:
+            return file.read()
+
+
+def encode_ogg(wav, quality):
+    # Vorbis bytes for wav bytes, or None without ffmpeg
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    result = subprocess.run([ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-c:a", "libvorbis",
+                             "-q:a", str(quality), "-f", "ogg", "pipe:1"],
+                            input=wav, capture_output=True)
+    if result.returncode:
+        print(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+        return None
+    return result.stdout
+
+
+def sound_bytes(name, ext, rate, quality):
+    # The bundled form of one effect, from the .wav master
+    wav = downsample(name + ".wav", rate)
+    if ext == ".wav":
+        return wav
+    ogg = encode_ogg(wav, quality)
+    if ogg is None:
+        with open(name + ext, "rb") as file:
+            return file.read()
+    return ogg
+
+
+def check_out(out):
+    # Raises ValueError unless out is missing, empty or an earlier bundle,
+    # as build() deletes whatever is there
+    out = os.path.abspath(out)
+    here = os.path.dirname(os.path.abspath(__file__))
+    if os.path.commonpath([out, here]) == out:
+        raise ValueError(f"{out} holds the source tree")
+    if os.path.exists(out) and not os.path.isdir(out):
+        raise ValueError(f"{out} is not a directory")
+    if os.path.isdir(out) and os.listdir(out) and not os.path.exists(os.path.join(out, MANIFEST_FILE)):
+        raise ValueError(f"{out} exists and is not a bundle; remove it or pick another --out")
+
+
+def build(platform, out, rate=22050, quality=2):
+    check_out(out)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import main
+    from atlas import SpriteAtlas
+    if platform == "desktop":
+        importlib.import_module("leaderboard")  # main.py imports it only with the leaderboard on
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))  # the atlas is converted for a display
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    assets = {}  # source file name -> bundled bytes
+
+    def scaled(filename, size):
+        return png_bytes(pygame.transform.scale(pygame.image.load(filename), size))
+
+    assets[main.BACKGROUND_FILE] = scaled(main.BACKGROUND_FILE, (main.WIDTH, main.HEIGHT))
+    assets[main.TITLE_SPRITE] = scaled(main.TITLE_SPRITE, main.sprite_files[main.TITLE_SPRITE])
+    atlas = SpriteAtlas.build(main.sprite_files)
+    assets[ATLAS_FILE] = png_bytes(atlas.surface)
+    ext = main.SOUND_EXTS[platform]
+    for name, *_ in main.SOUND_EFFECTS:
+        assets[name + ext] = sound_bytes(name, ext, rate, quality)
+
+    # Every module main.py imports from this directory, and main.py itself,
+    # but not this script
+    modules = sorted({os.path.basename(module.__file__) for name, module in list(sys.modules.items())
+                      if name not in ("__main__", __name__) and getattr(module, "__file__", None)
+                      and os.path.dirname(os.path.abspath(module.__file__)) == here})
+
+    manifest = {"version": MANIFEST_VERSION, "platform": platform, "sprites": atlas.rects,
+                "bytes": {filename: len(data) for filename, data in assets.items()},
+                "sha256": {filename: hashlib.sha256(data).hexdigest() for filename, data in assets.items()}}
+
+    # Written into a fresh directory beside out, which then replaces out, so
+    # nothing from an earlier build (or pygbag's build/ under it) survives
+    parent = os.path.dirname(os.path.abspath(out))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=parent)
+    try:
+        os.chmod(staging, 0o755)
+        for filename, data in assets.items():
+            with open(os.path.join(staging, filename), "wb") as file:
+                file.write(data)
+        for filename in modules:
+            shutil.copyfile(os.path.join(here, filename), os.path.join(staging, filename))
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        if os.path.exists(out):
+            shutil.rmtree(out)
+        os.rename(staging, out)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest, modules
+
+
+def source_bytes(main):
+    # What the source tree ships for the same assets: every sprite file and
+    # both formats of every sound
+    filenames = [main.BACKGROUND_FILE] + list(main.sprite_files)
+    filenames += [name + ext for name, *_ in main.SOUND_EFFECTS for ext in main.SOUND_EXTS.values()]
+    return sum(os.path.getsize(filename) for filename in filenames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build Stampede's asset bundle for one platform.")
+    parser.add_argument("platform", choices=("web", "desktop"))
+    parser.add_argument("--out", help=f"output directory (default {DEFAULT_OUT}/<platform>)")
+    parser.add_argument("--rate", type=int, default=22050, help="sound sample rate in Hz")
+    parser.add_argument("--quality", type=int, default=2, help="Vorbis quality for .ogg, 0-10")
+    args = parser.parse_args(argv)
+
+    out = args.out or os.path.join(DEFAULT_OUT, args.platform)
+    try:
+        manifest, modules = build(args.platform, out, args.rate, args.quality)
+    except ValueError as e:
+        parser.error(str(e))
+    import main as game
+
+    for filename, size in sorted(manifest["bytes"].items()):
+        print(f"{filename:32} {size:8} bytes")
+    total = sum(manifest["bytes"].values())
+    print(f"{len(modules)} modules and {len(manifest['bytes'])} assets in {out}: "
+          f"{total} bytes of assets (source tree: {source_bytes(game)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
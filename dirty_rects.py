@@ -0,0 +1,70 @@
+"""Dirty-rectangle screen updates.
+
+Most of the 800x600 screen is background that does not change between
+frames; only a few sprites, the lasso and the HUD move. DirtyRects restores
+the background under whatever was drawn last frame instead of blitting all
+of it, collects the rects drawn this frame and pushes only the union of old
+and new areas to the display with pygame.display.update(rects).
+
+When the changed area is a large part of the screen, one full flip is
+cheaper than many small updates, so present() falls back to flip(). A full
+redraw can also be forced with invalidate(), e.g. when the game state
+changes or the window is uncovered, and enabled=False always redraws and
+flips the whole screen.
+
+layers is something drawn over the background that changes every frame,
+such as the scrolling bands of a ParallaxBackground (parallax.py):
+clear() draws it after restoring the background, its rects are updated
+every frame and, being redrawn anyway, they are never restored first.
+"""
+import pygame
+
+
+class DirtyRects:
+    def __init__(self, screen, background, enabled=True, full_fraction=0.5, layers=None):
+        self.screen = screen
+        self.background = background
+        self.layers = layers
+        self.enabled = enabled
+        self.bounds = screen.get_rect()
+        # Above this many changed pixels a whole-screen flip is used instead
+        self.full_area = full_fraction * self.bounds.width * self.bounds.height
+        self.previous = []
+        self.current = []
+        self.full = True  # nothing on screen yet
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def invalidate(self):
+        self.full = True
+
+    def clear(self, alpha=1.0):
+        # Start a frame: put background back where the last frame drew, then
+        # the layers, alpha of the way through their last move
+        if self.full or not self.enabled:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            redrawn = self.layers.rects if self.layers else ()
+            for rect in self.previous:
+                if rect not in redrawn:
+                    self.screen.blit(self.background, rect, rect)
+        self.current = list(self.layers.draw(self.screen, alpha)) if self.layers else []
+
+    def add(self, rect):
+        if rect:
+            self.current.append(rect.clip(self.bounds))
+
+    def present(self):
+        redrawn = self.layers.rects if self.layers else ()
+        rects = [rect for rect in self.previous if rect not in redrawn] + self.current
+        if not self.full and self.enabled and sum(r.width * r.height for r in rects) > self.full_area:
+            self.full = True
+        if self.full or not self.enabled:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(rects)
+            self.partial_frames += 1
+        self.previous = self.current
+        self.current = []
+        self.full = False
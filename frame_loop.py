@@ -0,0 +1,123 @@
+"""Fixed-rate simulation under a variable-rate renderer.
+
+Game.step always advances the same slice of game time, so the game plays
+the same however fast frames are drawn. FixedStep turns the real time each
+frame took into a number of steps to run, carrying the remainder to the
+next frame; Interpolator draws moving things that fraction of a step
+between where they were and where they are, so motion stays smooth when
+the display and the simulation run at different rates.
+
+QualityGovernor watches how long frames take and, while they run over the
+target, drops optional work one level at a time (see QUALITY_LEVELS),
+restoring it once there is room to spare again.
+"""
+
+# What each governor level gives up, cumulatively
+QUALITY_LEVELS = (
+    "full",           # everything
+    "hud",            # HUD values refreshed a few times a second, not every frame
+    "interpolation",  # sprites drawn where the last step left them
+    "lasso",          # lasso drawn as a plain line instead of rope sprites
+)
+
+
+class FixedStep:
+    def __init__(self, step_seconds, max_steps=5):
+        self.step_seconds = step_seconds
+        self.max_steps = max_steps  # per frame; time beyond that is dropped
+        self.accumulator = 0.0
+        self.dropped = 0.0  # seconds of real time skipped after stalls
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        # Steps to run for a frame that took elapsed seconds
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step_seconds)
+        if steps > self.max_steps:
+            # After a stall (tab in the background, a long GC) catch up
+            # only so far rather than freezing to replay every step
+            skipped = (steps - self.max_steps) * self.step_seconds
+            self.dropped += skipped
+            self.accumulator -= skipped
+            steps = self.max_steps
+        self.accumulator -= steps * self.step_seconds
+        return steps
+
+    @property
+    def alpha(self):
+        # How far into the next step the frame is drawn, 0 to 1
+        return min(1.0, self.accumulator / self.step_seconds)
+
+
+# Positions before the latest step, to draw between it and the current one
+class Interpolator:
+    def __init__(self, max_move):
+        # Entities come from pools, so an entity that moved further than this
+        # in one step is a new one reusing an old object: draw it as it is
+        self.max_move = max_move
+        self.previous = {}
+        self.player_y = None
+
+    def clear(self):
+        self.previous = {}
+        self.player_y = None
+
+    def capture(self, game):
+        # Call before each step
+        self.previous = {entity: entity.x for entity in game.entities()}
+        self.player_y = game.player.y
+
+    def entity_x(self, entity, alpha):
+        x = entity.x
+        before = self.previous.get(entity)
+        if before is None or abs(x - before) > self.max_move:
+            return x
+        return before + (x - before) * alpha
+
+    def player_y_at(self, player, alpha):
+        if self.player_y is None:
+            return player.y
+        return self.player_y + (player.y - self.player_y) * alpha
+
+
+class QualityGovernor:
+    def __init__(self, target_fps, smoothing=0.1, patience=30):
+        self.budget = 1 / target_fps
+        self.smoothing = smoothing
+        self.patience = patience  # frames a trend must last before acting
+        self.average = 0.0  # smoothed seconds of work per frame
+        self.level = 0
+        self.over = 0
+        self.under = 0
+        self.changes = 0
+
+    def record(self, work_seconds):
+        # Time a frame spent working, not waiting for the next frame
+        self.average += (work_seconds - self.average) * self.smoothing
+        if self.average > self.budget * 0.9:
+            self.over += 1
+            self.under = 0
+            if self.over >= self.patience and self.level < len(QUALITY_LEVELS) - 1:
+                self.level += 1
+                self.over = 0
+                self.changes += 1
+        elif self.average < self.budget * 0.5:
+            self.under += 1
+            self.over = 0
+            # Slower to restore than to drop, so it does not flap
+            if self.under >= self.patience * 4 and self.level > 0:
+                self.level -= 1
+                self.under = 0
+                self.changes += 1
+        else:
+            self.over = self.under = 0
+
+    def dropped(self, name):
+        # True once the governor has given up the named work
+        return self.level >= QUALITY_LEVELS.index(name)
+
+    @property
+    def name(self):
+        return QUALITY_LEVELS[self.level]
@@ -0,0 +1,67 @@
+"""Cached text rendering for the HUD and menu screens.
+
+Font rasterisation is one of the most expensive things a frame can do,
+especially on the wasm build, and almost all of the game's text is the same
+from one frame to the next. TextCache keeps rendered surfaces keyed by
+(text, font, colour) with least-recently-used eviction, and Hud only
+re-renders and re-centres the score line when one of its values changes.
+"""
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (text, font, color, antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.entries[key] = font.render(text, antialias, color)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+
+# The centred "Score  High  Lives" line across the top of the screen
+class Hud:
+    def __init__(self, font, cache, screen_width, color, y=10, spacing=50):
+        self.font = font
+        self.cache = cache
+        self.screen_width = screen_width
+        self.color = color
+        self.y = y
+        self.spacing = spacing
+        self.values = None
+        self.blits = []
+        self.rect = None  # area the line covers, for partial screen updates
+
+    def layout(self, score, high_score, lives):
+        texts = [self.cache.render(self.font, text, self.color)
+                 for text in (f"Score: {score}", f"High: {high_score}", f"Lives: {lives}")]
+        total_width = sum(t.get_width() for t in texts) + (len(texts) - 1) * self.spacing
+        x = (self.screen_width - total_width) // 2
+        self.blits = []
+        for text in texts:
+            self.blits.append((text, (x, self.y)))
+            x += text.get_width() + self.spacing
+        rects = [text.get_rect(topleft=pos) for text, pos in self.blits]
+        self.rect = rects[0].unionall(rects[1:])
+
+    def draw(self, screen, score, high_score, lives):
+        values = (score, high_score, lives)
+        if values != self.values:
+            self.values = values
+            self.layout(score, high_score, lives)
+        screen.blits(self.blits, doreturn=False)
+        return self.rect
@@ -0,0 +1,202 @@
+"""Local leaderboard of every finished session, in SQLite.
+
+    python leaderboard.py top -n 10 [--day 2026-10-18]
+    python leaderboard.py days -n 14
+    python leaderboard.py percentile 90 [--day 2026-10-18]
+
+Each run is one row: when it ended (and the local day, for per-day boards),
+score, play time in ticks, seed, cattle and power-ups lassoed by kind and
+lives lost by cause. Indexes on score and on (day, score) keep top-N,
+per-day and percentile queries to an index walk, so a cabinet with months
+of sessions never loads them all.
+
+record() only copies the numbers out of the Game and queues them; a writer
+thread inserts whatever has queued up in one transaction, so the game loop
+never waits on the disk. The database runs in WAL mode, so this script can
+query it while a game is writing to it.
+"""
+import argparse
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from simulation import CAUSE_ESCAPED, CAUSE_OBSTACLE, CAUSE_SKULL, LASSO_TARGETS
+from stats import nearest_rank
+
+DEFAULT_PATH = "leaderboard.db"
+CAUSES = (CAUSE_ESCAPED, CAUSE_OBSTACLE, CAUSE_SKULL)
+COLUMNS = (("ended", "REAL"), ("day", "TEXT"), ("score", "INTEGER"), ("play_time", "INTEGER"),
+           ("seed", "INTEGER")) + tuple(
+    (f"caught_{kind}", "INTEGER") for kind in LASSO_TARGETS) + tuple(
+    (f"lost_{cause}", "INTEGER") for cause in CAUSES)
+NAMES = tuple(name for name, _ in COLUMNS)
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{name} {kind} NOT NULL" for name, kind in COLUMNS) + ")",
+    "CREATE INDEX IF NOT EXISTS runs_score ON runs (score)",
+    "CREATE INDEX IF NOT EXISTS runs_day_score ON runs (day, score)",
+]
+INSERT = f"INSERT INTO runs ({', '.join(NAMES)}) VALUES ({', '.join('?' * len(NAMES))})"
+
+
+def run_row(game, ended=None):
+    # The values stored for a finished Game, in NAMES order
+    ended = time.time() if ended is None else ended
+    return ((ended, time.strftime("%Y-%m-%d", time.localtime(ended)), game.score, game.play_time,
+             game.seed)
+            + tuple(game.caught[kind] for kind in LASSO_TARGETS)
+            + tuple(game.lives_lost[cause] for cause in CAUSES))
+
+
+def connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class Leaderboard:
+    def __init__(self, path=DEFAULT_PATH, background=True):
+        self.path = path
+        self.connection = connect(path)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+        self.lock = threading.Lock()  # one statement at a time on the connection
+        self.pending = queue.Queue()
+        self.writes = 0  # transactions committed
+        self.recorded = 0  # runs inserted
+        self.errors = 0
+        self.writer = None
+        if background:
+            self.writer = threading.Thread(target=self._write_loop, name="leaderboard", daemon=True)
+            self.writer.start()
+
+    def record(self, game, ended=None):
+        row = run_row(game, ended)
+        if self.writer is None:
+            self._insert([row])
+        else:
+            self.pending.put(row)
+
+    def _write_loop(self):
+        while True:
+            rows = [self.pending.get()]
+            # Everything queued meanwhile goes in the same transaction
+            while True:
+                try:
+                    rows.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            self._insert([row for row in rows if row is not None])
+            for _ in rows:
+                self.pending.task_done()
+            if stop:
+                return
+
+    def _insert(self, rows):
+        if not rows:
+            return
+        try:
+            with self.lock, self.connection:
+                self.connection.executemany(INSERT, rows)
+            self.writes += 1
+            self.recorded += len(rows)
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Leaderboard not written: {e}")
+
+    def flush(self):
+        # Blocks until every recorded run is in the database
+        if self.writer is not None:
+            self.pending.join()
+
+    def close(self):
+        if self.writer is not None:
+            self.pending.put(None)
+            self.writer.join()
+            self.writer = None
+        self.connection.close()
+
+    def _query(self, sql, args=()):
+        with self.lock:
+            cursor = self.connection.execute(sql, args)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def count(self, day=None):
+        if day is None:
+            return self._query("SELECT COUNT(*) AS n FROM runs")[0]["n"]
+        return self._query("SELECT COUNT(*) AS n FROM runs WHERE day = ?", (day,))[0]["n"]
+
+    def top(self, n=10, day=None):
+        # Best runs first; earlier runs win ties
+        if day is None:
+            return self._query("SELECT * FROM runs ORDER BY score DESC, id LIMIT ?", (n,))
+        return self._query("SELECT * FROM runs WHERE day = ? ORDER BY score DESC, id LIMIT ?", (day, n))
+
+    def days(self, n=14):
+        # Most recent days first, with each day's run count, best and mean
+        return self._query("SELECT day, COUNT(*) AS runs, MAX(score) AS best, AVG(score) AS mean "
+                           "FROM runs GROUP BY day ORDER BY day DESC LIMIT ?", (n,))
+
+    def percentile(self, p, day=None):
+        # Nearest-rank percentile of score (see stats.py), or None with no runs
+        n = self.count(day)
+        if not n:
+            return None
+        offset = nearest_rank(n, p)
+        if day is None:
+            rows = self._query("SELECT score FROM runs ORDER BY score LIMIT 1 OFFSET ?", (offset,))
+        else:
+            rows = self._query("SELECT score FROM runs WHERE day = ? ORDER BY score LIMIT 1 OFFSET ?",
+                               (day, offset))
+        return rows[0]["score"]
+
+    def rank(self, score, day=None):
+        # 1-based position a run with this score takes on the board
+        if day is None:
+            rows = self._query("SELECT COUNT(*) AS n FROM runs WHERE score > ?", (score,))
+        else:
+            rows = self._query("SELECT COUNT(*) AS n FROM runs WHERE day = ? AND score > ?", (day, score))
+        return rows[0]["n"] + 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the local leaderboard.")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    top = commands.add_parser("top", help="best runs")
+    top.add_argument("-n", type=int, default=10)
+    top.add_argument("--day", help="YYYY-MM-DD, local time")
+    days = commands.add_parser("days", help="runs, best and mean score per day")
+    days.add_argument("-n", type=int, default=14)
+    percentile = commands.add_parser("percentile", help="score at a percentile")
+    percentile.add_argument("p", type=float)
+    percentile.add_argument("--day", help="YYYY-MM-DD, local time")
+    args = parser.parse_args(argv)
+
+    board = Leaderboard(args.db, background=False)
+    try:
+        if args.command == "top":
+            for i, run in enumerate(board.top(args.n, args.day), 1):
+                caught = " ".join(f"{kind} {run['caught_' + kind]}" for kind in LASSO_TARGETS)
+                lost = " ".join(f"{cause} {run['lost_' + cause]}" for cause in CAUSES)
+                print(f"{i:3}. {run['score']:6}  {run['day']}  {run['play_time'] / 60:6.0f}s  "
+                      f"caught: {caught}  lost: {lost}")
+        elif args.command == "days":
+            for day in board.days(args.n):
+                print(f"{day['day']}  {day['runs']:6} runs  best {day['best']:6}  mean {day['mean']:.1f}")
+        else:
+            print(board.percentile(args.p, args.day))
+    finally:
+        board.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,36 @@
+import time
+STARTED = time.perf_counter()  # startup timings count from here
+
 import pygame
-import random
-import math
 import asyncio
 import sys
 import os
 import ctypes
 
-# Set Windows audio driver workaround before init
-if os.name == 'nt':
-    os.environ['SDL_AUDIODRIVER'] = 'directsound'
-
-pygame.init()
-
-# Screen setup
-WIDTH = 800
-HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Stampede - Middle Gameplay Area")
+from simulation import (
+    WIDTH, HEIGHT, LASSO_ANGLE, LASSO_ORIGIN, LASSO_LENGTHS, LASSO_END, MAX_BOUNCE_STEP, Game, Inputs,
+    FIXED_SPEEDS, SOUND_LASSO, SOUND_POINT, SOUND_HIT, SOUND_HIT_STOP, SOUND_YEHA,
+    TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP,
+)
+from replay import InputRecorder
+from profiler import FrameProfiler, ProfilerOverlay
+from hud import TextCache, Hud
+from dirty_rects import DirtyRects
+from parallax import ParallaxBackground
+from atlas import SpriteAtlas
+from frame_loop import FixedStep, Interpolator, QualityGovernor
+from scores import ScoreStore, FileBackend, LocalStorageBackend
+from audio import SoundManager, LOW_LATENCY_BUFFER, SAFE_BUFFER
+from assets import AssetLoader, ATLAS_FILE, read_manifest
+
+# Mixer buffer in samples; STAMPEDE_AUDIO_BUFFER overrides the size (a power of two)
+AUDIO_BUFFER = int(os.environ.get("STAMPEDE_AUDIO_BUFFER",
+                                  SAFE_BUFFER if sys.platform == "emscripten" else LOW_LATENCY_BUFFER))
+
+# Importing this module opens no window, audio device or file, so tools and
+# tests can use what is in it; bootstrap() below sets these up for a game
+screen = None
+CLOCK = None
 
 # Colors
 WHITE = (255, 255, 255)
@@ -27,12 +41,6 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 RED = (255, 0, 0)
 
-# Gameplay boundaries
-TOP_LIMIT = 100
-BOTTOM_LIMIT = 500
-LANE_SPACING = 50
-LANES = [TOP_LIMIT + i * LANE_SPACING for i in range((BOTTOM_LIMIT - TOP_LIMIT) // LANE_SPACING)]
-
 # Load sprites (assume preloaded in pygbag.toml, no existence checks)
 sprite_files = {
     "cowboy_stand.png": (80, 80),
@@ -44,7 +52,6 @@ sprite_files = {
     "cattle_fast_2.png": (100, 60),
     "cattle_fastest_1.png": (100, 60),
     "cattle_fastest_2.png": (100, 60),
-    "desert_bg.png": (800, 600),
     "cactus_1.png": (25, 25),
     "cactus_2.png": (25, 25),
     "cactus_3.png": (25, 25),
@@ -54,617 +61,547 @@ sprite_files = {
     "skull.png": (50, 50)
 }
 
-try:
-    for filename, size in sprite_files.items():
-        sprite_files[filename] = pygame.transform.scale(pygame.image.load(filename), size)
-except Exception as e:
-    # Fallback surfaces if loading fails
-    COWBOY_STAND = pygame.Surface((80, 80))
-    COWBOY_STAND.fill((255, 0, 0))
-    COWBOY_FRAMES = [pygame.Surface((80, 80)) for _ in range(2)]
-    for frame in COWBOY_FRAMES: frame.fill((255, 0, 0))
-    CATTLE_SLOW_FRAMES = [pygame.Surface((100, 60)) for _ in range(2)]
-    for frame in CATTLE_SLOW_FRAMES: frame.fill((139, 69, 19))
-    CATTLE_FAST_FRAMES = [pygame.Surface((100, 60)) for _ in range(2)]
-    for frame in CATTLE_FAST_FRAMES: frame.fill((165, 42, 42))
-    CATTLE_FASTEST_FRAMES = [pygame.Surface((100, 60)) for _ in range(2)]
-    for frame in CATTLE_FASTEST_FRAMES: frame.fill((200, 0, 0))
-    BACKGROUND = pygame.Surface((WIDTH, HEIGHT))
-    BACKGROUND.fill((100, 100, 100))
-    OBSTACLE_FRAMES = [pygame.Surface((25, 25)) for _ in range(3)]
-    for frame in OBSTACLE_FRAMES: frame.fill((0, 255, 0))
-    ROPE_SEGMENT = pygame.Surface((10, 5))
-    ROPE_SEGMENT.fill(TAN)
-    LASSO_LOOP = pygame.Surface((30, 30))
-    LASSO_LOOP.fill(TAN)
-    POWER_UP = pygame.Surface((100, 60))
-    POWER_UP.fill((0, 0, 0))
-    SKULL = pygame.Surface((50, 50))
-    SKULL.fill((255, 255, 255))
-else:
-    COWBOY_STAND = sprite_files["cowboy_stand.png"]
-    COWBOY_FRAMES = [sprite_files["cowboy_move_1.png"], sprite_files["cowboy_move_2.png"]]
-    CATTLE_SLOW_FRAMES = [sprite_files["cattle_slow_1.png"], sprite_files["cattle_slow_2.png"]]
-    CATTLE_FAST_FRAMES = [sprite_files["cattle_fast_1.png"], sprite_files["cattle_fast_2.png"]]
-    CATTLE_FASTEST_FRAMES = [sprite_files["cattle_fastest_1.png"], sprite_files["cattle_fastest_2.png"]]
-    BACKGROUND = sprite_files["desert_bg.png"]
-    OBSTACLE_FRAMES = [sprite_files["cactus_1.png"], sprite_files["cactus_2.png"], sprite_files["cactus_3.png"]]
-    ROPE_SEGMENT = sprite_files["rope_segment.png"]
-    LASSO_LOOP = sprite_files["lasso_loop.png"]
-    POWER_UP = sprite_files["cattle_black.png"]
-    SKULL = sprite_files["skull.png"]
+# Solid colours drawn instead when the sprites cannot be loaded
+FALLBACK_COLORS = {
+    "cowboy_stand.png": (255, 0, 0),
+    "cowboy_move_1.png": (255, 0, 0),
+    "cowboy_move_2.png": (255, 0, 0),
+    "cattle_slow_1.png": (139, 69, 19),
+    "cattle_slow_2.png": (139, 69, 19),
+    "cattle_fast_1.png": (165, 42, 42),
+    "cattle_fast_2.png": (165, 42, 42),
+    "cattle_fastest_1.png": (200, 0, 0),
+    "cattle_fastest_2.png": (200, 0, 0),
+    "cactus_1.png": (0, 255, 0),
+    "cactus_2.png": (0, 255, 0),
+    "cactus_3.png": (0, 255, 0),
+    "rope_segment.png": TAN,
+    "lasso_loop.png": TAN,
+    "cattle_black.png": (0, 0, 0),
+    "skull.png": (255, 255, 255),
+}
+
+def fallback_sprite(filename):
+    surface = pygame.Surface(sprite_files[filename])
+    surface.fill(FALLBACK_COLORS[filename])
+    return surface
+
+# A bundle built by bundle.py has a manifest, and its images are already at
+# their drawn sizes; from the source tree there is none and the images are
+# scaled as they load. Read by bootstrap().
+MANIFEST = None
+
+def load_image(filename, size):
+    image = pygame.image.load(filename)
+    if image.get_size() != size:
+        image = pygame.transform.scale(image, size)
+    return image
+
+# The packed atlas is kept here between runs; STAMPEDE_SPRITE_CACHE overrides
+# the directory and an empty value turns the cache off. The web build's file
+# system does not outlive the page, so it always builds the atlas.
+SPRITE_CACHE = os.environ.get("STAMPEDE_SPRITE_CACHE",
+                              None if sys.platform == "emscripten" else ".sprite_cache")
+
+# The title screen only needs the background and the standing cowboy, so
+# bootstrap() loads those and everything else loads between frames (ASSETS below)
+BACKGROUND_FILE = "desert_bg.png"
+TITLE_SPRITE = "cowboy_stand.png"
+BACKGROUND = None
+COWBOY_STAND = None
+
+# The fences along the top and bottom of the background scroll past as the
+# herd runs: (y, height, speed) of each band, the far fence slower than the
+# near one. At difficulty 1 the near fence keeps pace with the cacti on the
+# ground, and it speeds up with the difficulty.
+PARALLAX_LAYERS = ((32, 52, 0.6), (514, 56, 1.0))
+GROUND_SPEED = FIXED_SPEEDS["obstacle"]
+PARALLAX = None
+
+def load_title_assets():
+    global MANIFEST, BACKGROUND, COWBOY_STAND, PARALLAX
+    MANIFEST = read_manifest()
+    try:
+        BACKGROUND = load_image(BACKGROUND_FILE, (WIDTH, HEIGHT)).convert()
+    except Exception as e:
+        print(f"Background loading failed: {e}")
+        BACKGROUND = pygame.Surface((WIDTH, HEIGHT))
+        BACKGROUND.fill((100, 100, 100))
+    PARALLAX = ParallaxBackground(BACKGROUND, PARALLAX_LAYERS)
+    try:
+        COWBOY_STAND = load_image(TITLE_SPRITE, sprite_files[TITLE_SPRITE]).convert_alpha()
+    except Exception:
+        COWBOY_STAND = fallback_sprite(TITLE_SPRITE)
+
+# Filled in by load_sprites: cowboy frames, and frames for each entity kind
+# indexed by the entity's frame_index
+COWBOY_FRAMES = []
+ENTITY_FRAMES = {}
 
 # Load sounds with platform-specific extension
-pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
+SOUND_EXTS = {"web": ".ogg", "desktop": ".wav"}
+sound_ext = SOUND_EXTS["web" if sys.platform == "emscripten" else "desktop"]
 
-# Reset audio to default device on Windows (local only)
-if os.name == 'nt' and sys.platform != "emscripten":
+def load_sound(name):
     try:
-        MMDEVAPI = ctypes.windll.winmm
-        MMDEVAPI.waveOutMessage(0, 0x400 + 11, 0, 0)  # DRV_QUERYDEVICEINTERFACE (simplified reset)
+        return pygame.mixer.Sound(name + sound_ext)
     except Exception as e:
-        print(f"Audio reset failed: {e}")
-
-sound_ext = ".ogg" if sys.platform == "emscripten" else ".wav"
-try:
-    LASSO_SOUND = pygame.mixer.Sound("lasso" + sound_ext)
-    POINT_SOUND = pygame.mixer.Sound("point" + sound_ext)
-    HIT_SOUND = pygame.mixer.Sound("hit" + sound_ext)
-    YEHA_SOUND = pygame.mixer.Sound("yeha" + sound_ext)
-    YEHA_CHANNEL = pygame.mixer.Channel(0)
-except Exception as e:
-    print(f"Sound loading failed: {e}")
-    # Stub sounds if failed
-    class StubSound:
-        def play(self): pass
-        def stop(self): pass
-    LASSO_SOUND = StubSound()
-    POINT_SOUND = StubSound()
-    HIT_SOUND = StubSound()
-    YEHA_SOUND = StubSound()
+        print(f"Sound loading failed: {e}")
+        return None  # plays as silence
+
+# Effects are named after the simulation's sound events:
+# (name, priority, min_interval, reserve). The yeha keeps a channel of its
+# own; the rest share the others by priority, and the intervals stop a
+# burst of events in one tick from stacking up.
+SOUND_EFFECTS = (
+    (SOUND_YEHA, 3, 0, True),
+    (SOUND_LASSO, 3, 50, False),
+    (SOUND_HIT, 2, 100, False),
+    (SOUND_POINT, 1, 30, False),
+)
+SOUNDS = None
+
+def init_audio():
+    # Each effect stays silent until ASSETS has loaded its sound
+    global SOUNDS
+    if os.name == 'nt':
+        os.environ['SDL_AUDIODRIVER'] = 'directsound'  # Windows audio driver workaround
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=AUDIO_BUFFER)
+
+    # Reset audio to default device on Windows (local only)
+    if os.name == 'nt' and sys.platform != "emscripten":
+        try:
+            MMDEVAPI = ctypes.windll.winmm
+            MMDEVAPI.waveOutMessage(0, 0x400 + 11, 0, 0)  # DRV_QUERYDEVICEINTERFACE (simplified reset)
+        except Exception as e:
+            print(f"Audio reset failed: {e}")
+
+    SOUNDS = SoundManager()
+    for name, priority, min_interval, reserve in SOUND_EFFECTS:
+        SOUNDS.add(name, None, priority, min_interval, reserve)
 
 # Conditional import for browser storage
 if sys.platform == "emscripten":
     from platform import window
 
+# Set STAMPEDE_RECORD to a directory to log every session's inputs for replay.py
+RECORD_DIR = os.environ.get("STAMPEDE_RECORD")
+
+# Set STAMPEDE_PROFILE to start with the frame profiler on; a value ending in
+# .csv or .json also dumps the trace there on exit. F3 toggles it in game.
+PROFILE = os.environ.get("STAMPEDE_PROFILE")
+PROFILE_DUMP = PROFILE if PROFILE and PROFILE.endswith((".csv", ".json")) else None
+
+# Only the changed parts of the screen are redrawn and updated each frame;
+# STAMPEDE_RENDER=full redraws and flips the whole screen every frame instead
+DIRTY_RECTS = os.environ.get("STAMPEDE_RENDER", "dirty") != "full"
+
+# STAMPEDE_TICK_SCALE=2 runs the game at 30 steps a second, each covering two
+# 60 Hz frames, for devices that cannot keep up with 60
+TICK_SCALE = int(os.environ.get("STAMPEDE_TICK_SCALE", "1"))
+STEP_SECONDS = TICK_SCALE / 60
+
+# Frames drawn a second (0: as fast as possible). The game steps at its own
+# fixed rate whatever this is, so it plays the same on any display.
+FPS = int(os.environ.get("STAMPEDE_FPS", "60"))
+
+# With the governor dropping "hud", the HUD shows new values this often
+HUD_REFRESH_FRAMES = 6
+
 # Helper functions
-def load_high_score():
+def start_recording(game):
+    if not RECORD_DIR:
+        return None
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    return InputRecorder(os.path.join(RECORD_DIR, f"session-{game.seed}.stpl"), game)
+
+# Every finished session also goes into a local SQLite leaderboard (see
+# leaderboard.py); STAMPEDE_LEADERBOARD sets the file, empty turns it off.
+# The browser keeps only the scores.
+LEADERBOARD_PATH = os.environ.get("STAMPEDE_LEADERBOARD",
+                                  None if sys.platform == "emscripten" else "leaderboard.db")
+SCORES = None
+LEADERBOARD = None
+
+def open_storage():
+    # Scores go to localStorage in the browser and scores.json on the desktop,
+    # written in the background; both still read the old high score once
+    global SCORES, LEADERBOARD
     if sys.platform == "emscripten":
-        high_score_str = window.localStorage.getItem("stampede_high_score")
-        return int(high_score_str) if high_score_str else 0
+        SCORES = ScoreStore(LocalStorageBackend(window.localStorage, "stampede_scores", "stampede_high_score"),
+                            background=False)
     else:
-        try:
-            with open("high_score.txt", "r") as file:
-                return int(file.read().strip())
-        except (FileNotFoundError, ValueError):
-            return 0
+        SCORES = ScoreStore(FileBackend("scores.json", "high_score.txt"))
+    if LEADERBOARD_PATH:
+        from leaderboard import Leaderboard
+        LEADERBOARD = Leaderboard(LEADERBOARD_PATH)
+
+def load_high_score():
+    return SCORES.load()
 
 def save_high_score(score):
-    if sys.platform == "emscripten":
-        window.localStorage.setItem("stampede_high_score", str(score))
-    else:
-        with open("high_score.txt", "w") as file:
-            file.write(str(score))
+    SCORES.set_high_score(score)
 
 def load_start_score():
     return 0
 
-# Player class
-class Player:
-    def __init__(self):
-        self.width = 80
-        self.height = 80
-        self.x = 50
-        self.y = (TOP_LIMIT + BOTTOM_LIMIT) // 2
-        self.speed = 10
-        self.lassolength = 0
-        self.lassomax = 180
-        self.lasso_loop_radius = 15
-        self.frames = COWBOY_FRAMES
-        self.stand_frame = COWBOY_STAND
-        self.frame_index = 0
-        self.frame_timer = 0
-        self.lasso_active = False
-        self.touch_start_pos = None
-        self.is_dragging = False
-
-        self.fixed_angle = math.degrees(math.atan2(30, 180))
-        self.rotated_segment = pygame.transform.rotate(ROPE_SEGMENT, -self.fixed_angle)
-        self.rotated_loop = pygame.transform.rotate(LASSO_LOOP, -self.fixed_angle)
-
-    def handle_touch_down(self, pos):
-        self.touch_start_pos = pos
-        self.is_dragging = False
-
-    def handle_touch_move(self, pos):
-        if self.touch_start_pos:
-            dx = abs(pos[0] - self.touch_start_pos[0])
-            dy = abs(pos[1] - self.touch_start_pos[1])
-            if dy > 10 or dx > 10:  # Threshold to detect drag
-                self.is_dragging = True
-            if self.is_dragging:
-                target_y = pos[1] - self.height // 2
-                self.y = max(TOP_LIMIT, min(target_y, BOTTOM_LIMIT - self.height))
-
-    def handle_touch_up(self, pos):
-        if self.touch_start_pos and not self.is_dragging:
-            # It's a tap, activate lasso if possible
-            if self.lassolength == 0:
-                LASSO_SOUND.play()
-                self.lassolength = 1
-                self.lasso_active = True
-        self.touch_start_pos = None
-        self.is_dragging = False
-
-    def move(self):
-        keys = pygame.key.get_pressed()
-        # Keyboard controls (for desktop testing)
-        if keys[pygame.K_UP] and self.y > TOP_LIMIT:
-            self.y -= self.speed
-        if keys[pygame.K_DOWN] and self.y < BOTTOM_LIMIT - self.height:
-            self.y += self.speed
-        if keys[pygame.K_SPACE] and self.lassolength == 0:
-            LASSO_SOUND.play()
-            self.lassolength = 1
-            self.lasso_active = True
-
-        # Lasso extension logic
-        if self.lasso_active:
-            if self.lassolength < self.lassomax:
-                self.lassolength += 15
-            else:
-                self.lassolength = 0
-                self.lasso_active = False
-
-        self.frame_timer += 1
-        if self.frame_timer >= 10:
-            self.frame_timer = 0
-            self.frame_index = (self.frame_index + 1) % 2
-
-    def draw(self, game_state):
-        if game_state == "start":
-            screen.blit(self.stand_frame, (self.x, self.y))
-        else:
-            screen.blit(self.frames[self.frame_index], (self.x, self.y))
-            if self.lassolength > 0:
-                start_x = self.x + self.width
-                start_y = self.y + 10
-                end_x = start_x + self.lassolength
-                end_y = start_y + (30 * self.lassolength / self.lassomax)
-                dx = end_x - start_x
-                dy = end_y - start_y
-                segment_length = 10
-                num_segments = self.lassolength // segment_length
-                for i in range(num_segments):
-                    t = (i + 0.5) * (segment_length / self.lassolength)
-                    seg_x = start_x + dx * t
-                    seg_y = start_y + dy * t
-                    screen.blit(self.rotated_segment, self.rotated_segment.get_rect(center=(seg_x, seg_y)))
-                screen.blit(self.rotated_loop, self.rotated_loop.get_rect(center=(end_x, end_y)))
-
-# Cattle class
-class Cattle:
-    def __init__(self, type_="slow"):
-        self.width = 100
-        self.height = 60
-        self.x = WIDTH
-        free_lanes = [lane for lane in LANES if lane not in occupied_lanes]
-        self.y = random.choice(free_lanes) if free_lanes else -100
-        if self.y >= 0:
-            occupied_lanes.add(self.y)
-        if type_ == "fastest":
-            self.base_speed = random.uniform(4.5, 5.5)
-            self.points = 15
-            self.frames = CATTLE_FASTEST_FRAMES
-        elif type_ == "fast":
-            self.base_speed = random.uniform(3.5, 4.5)
-            self.points = 10
-            self.frames = CATTLE_FAST_FRAMES
+def render_lasso(length, segment, loop):
+    # Rope segments and loop for one lasso length on a single surface, and
+    # where that surface goes relative to the lasso's start. segment and
+    # loop are already rotated to the lasso's angle.
+    ox, oy = WIDTH, HEIGHT  # any start with positive coordinates rounds the same
+    dx = LASSO_END[length][0] - LASSO_ORIGIN[0]
+    dy = LASSO_END[length][1] - LASSO_ORIGIN[1]
+    segment_length = 10
+    blits = []
+    for i in range(length // segment_length):
+        t = (i + 0.5) * (segment_length / length)
+        blits.append((segment, segment.get_rect(center=(ox + dx * t, oy + dy * t))))
+    blits.append((loop, loop.get_rect(center=(ox + dx, oy + dy))))
+    bounds = blits[0][1].unionall([rect for _, rect in blits])
+    surface = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    for image, rect in blits:
+        surface.blit(image, rect.move(-bounds.x, -bounds.y))
+    return surface, (bounds.x - ox, bounds.y - oy)
+
+# The lasso only ever has a handful of lengths, so each is drawn once, by
+# load_sprites, into this table
+LASSO_SPRITES = {}
+
+def load_sprites():
+    # Asset job: the atlas a sprite per step, then the tables drawing uses
+    try:
+        if MANIFEST:
+            atlas = SpriteAtlas.load_packed(ATLAS_FILE, MANIFEST["sprites"])
         else:
-            self.base_speed = random.uniform(2.5, 3.5)
-            self.points = 5
-            self.frames = CATTLE_SLOW_FRAMES
-        self.speed = self.base_speed
-        self.frame_index = 0
-        self.frame_timer = 0
-        self.hit_cowboy = False
-
-    def move(self):
-        if self.hit_cowboy:
-            self.x += self.speed * 5
-            if self.x >= WIDTH:
-                self.speed = self.base_speed
-                self.hit_cowboy = False
+            atlas = yield from SpriteAtlas.load_steps(sprite_files, SPRITE_CACHE)
+        sprites = atlas.sprites
+    except Exception as e:
+        print(f"Sprite loading failed: {e}")
+        sprites = {filename: fallback_sprite(filename) for filename in sprite_files}
+    COWBOY_FRAMES[:] = [sprites["cowboy_move_1.png"], sprites["cowboy_move_2.png"]]
+    ENTITY_FRAMES.update({
+        "slow": [sprites["cattle_slow_1.png"], sprites["cattle_slow_2.png"]],
+        "fast": [sprites["cattle_fast_1.png"], sprites["cattle_fast_2.png"]],
+        "fastest": [sprites["cattle_fastest_1.png"], sprites["cattle_fastest_2.png"]],
+        "power_up": [sprites["cattle_black.png"]],
+        "obstacle": [sprites["cactus_1.png"], sprites["cactus_2.png"], sprites["cactus_3.png"]],
+        "skull": [sprites["skull.png"]],
+    })
+    # Lasso rope and loop are drawn at one fixed angle, so rotate them once
+    segment = pygame.transform.rotate(sprites["rope_segment.png"], -LASSO_ANGLE)
+    loop = pygame.transform.rotate(sprites["lasso_loop.png"], -LASSO_ANGLE)
+    for length in LASSO_LENGTHS:
+        yield
+        LASSO_SPRITES[length] = render_lasso(length, segment, loop)
+
+def sound_job(name):
+    def job():
+        SOUNDS.set_sound(name, load_sound(name))
+    return job
+
+# Everything past the title screen, loaded a slice per frame by main().
+# "play" must be ready before a game starts; sounds can still be arriving.
+ASSETS = AssetLoader(STARTED)
+ASSETS.add("sprites", load_sprites)
+for name in (SOUND_LASSO, SOUND_POINT, SOUND_HIT, SOUND_YEHA):
+    ASSETS.add("sound " + name, sound_job(name), group="audio")
+
+# Time for loading per frame while the loop keeps drawing
+LOAD_BUDGET = 0.008
+
+# Rendered text surfaces shared by the HUD and the menu screens
+TEXT_CACHE = TextCache()
+
+def play_sounds(events):
+    for event in events:
+        if event == SOUND_HIT_STOP:
+            SOUNDS.stop(SOUND_HIT)
+        elif event == SOUND_YEHA:
+            SOUNDS.stop(SOUND_LASSO, SOUND_POINT, SOUND_HIT)
+            SOUNDS.play(SOUND_YEHA)
         else:
-            self.x -= self.speed
-        if self.speed > 0:
-            self.frame_timer += 1
-            frame_rate = 10 if self.speed < 3 else 7
-            if self.frame_timer >= frame_rate:
-                self.frame_timer = 0
-                self.frame_index = (self.frame_index + 1) % 2
-
-    def remove(self):
-        if self.y in occupied_lanes:
-            occupied_lanes.remove(self.y)
-
-    def draw(self):
-        if self.y >= 0:
-            screen.blit(self.frames[self.frame_index], (self.x, self.y))
-
-# PowerUp class
-class PowerUp:
-    def __init__(self):
-        self.width = 100
-        self.height = 60
-        self.x = WIDTH
-        free_lanes = [lane for lane in LANES if lane not in occupied_lanes]
-        self.y = random.choice(free_lanes) if free_lanes else -100
-        if self.y >= 0:
-            occupied_lanes.add(self.y)
-        self.speed = 2.0
-        self.sprite = POWER_UP
-
-    def move(self):
-        self.x -= self.speed
-
-    def remove(self):
-        if self.y in occupied_lanes:
-            occupied_lanes.remove(self.y)
-
-    def draw(self):
-        if self.y >= 0:
-            screen.blit(self.sprite, (self.x, self.y))
-
-# Obstacle class
-class Obstacle:
-    def __init__(self):
-        self.width = 25
-        self.height = 25
-        self.x = WIDTH
-        free_lanes = [lane for lane in LANES if lane not in occupied_lanes]
-        self.y = random.choice(free_lanes) if free_lanes else -100
-        if self.y >= 0:
-            occupied_lanes.add(self.y)
-        self.speed = 2
-        self.frames = OBSTACLE_FRAMES
-        self.frame_index = 0
-        self.frame_timer = 0
-
-    def move(self):
-        self.x -= self.speed
-        self.frame_timer += 1
-        if self.frame_timer >= 10:
-            self.frame_timer = 0
-            self.frame_index = (self.frame_index + 1) % 3
-
-    def remove(self):
-        if self.y in occupied_lanes:
-            occupied_lanes.remove(self.y)
-
-    def draw(self):
-        if self.y >= 0:
-            screen.blit(self.frames[self.frame_index], (self.x, self.y))
-
-# Skull class
-class Skull:
-    def __init__(self):
-        self.width = 50
-        self.height = 50
-        self.x = WIDTH
-        free_lanes = [lane for lane in LANES if lane not in occupied_lanes]
-        self.y = random.choice(free_lanes) if free_lanes else -100
-        if self.y >= 0:
-            occupied_lanes.add(self.y)
-        self.speed = 2
-        self.sprite = SKULL
-
-    def move(self):
-        self.x -= self.speed
-
-    def remove(self):
-        if self.y in occupied_lanes:
-            occupied_lanes.remove(self.y)
-
-    def draw(self):
-        if self.y >= 0:
-            screen.blit(self.sprite, (self.x, self.y))
-
-occupied_lanes = set()
+            SOUNDS.play(event)
+
+# The draw functions return the screen area they covered. y and x override
+# the position, for drawing between two steps.
+def draw_player(player, game_state, y=None, plain_lasso=False):
+    if y is None:
+        y = player.y
+    if game_state == "start":
+        return screen.blit(COWBOY_STAND, (player.x, y))
+    else:
+        rect = screen.blit(COWBOY_FRAMES[player.frame_index], (player.x, y))
+        if player.lassolength > 0:
+            start_x, start_y = player.x + LASSO_ORIGIN[0], y + LASSO_ORIGIN[1]
+            if plain_lasso:
+                end_x, end_y = LASSO_END[player.lassolength]
+                rect = rect.union(pygame.draw.line(screen, TAN, (start_x, start_y),
+                                                   (player.x + end_x, y + end_y), 3))
+            else:
+                surface, (dx, dy) = LASSO_SPRITES[player.lassolength]
+                rect = rect.union(screen.blit(surface, (start_x + dx, start_y + dy)))
+        return rect
+
+def draw_entity(entity, x=None):
+    if entity.y >= 0:
+        return screen.blit(ENTITY_FRAMES[entity.kind][entity.frame_index],
+                           (entity.x if x is None else x, entity.y))
+    return None
+
+def read_inputs(touches):
+    keys = pygame.key.get_pressed()
+    return Inputs(keys[pygame.K_UP], keys[pygame.K_DOWN], keys[pygame.K_SPACE], touches)
+
+def init_display():
+    # Only the pygame modules the game uses, where pygame.init() would also
+    # start joysticks and the rest
+    global screen, CLOCK
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Stampede - Middle Gameplay Area")
+    CLOCK = pygame.time.Clock()  # also starts pygame.time, which SOUNDS reads
+
+def bootstrap():
+    # Opens the window, the audio device and the score files and loads the
+    # title screen's assets. main() calls it; tools that draw call it instead.
+    if screen is not None:
+        return
+    init_display()
+    init_audio()
+    load_title_assets()
+    open_storage()
+    ASSETS.mark("bootstrap")
 
 async def main():
-    global occupied_lanes
+    bootstrap()
     # Game variables
-    player = Player()
-    cattle_list = []
-    obstacles = []
-    power_ups = []
-    skulls = []
-    score = 0
-    lives = 3
+    game = Game(load_high_score(), tick_scale=TICK_SCALE)
     font = pygame.font.Font(None, 36)
     game_over_font = pygame.font.Font(None, 74)
     title_font = pygame.font.SysFont("impact", 100)
-    clock = pygame.time.Clock()
-    spawn_timer = 0
-    obstacle_spawn_timer = 0
-    hit_sound_timer = 0
-    hit_sound_interval = random.randint(120, 240)
-    play_time = 0
-    difficulty = 1.0
-    high_score = load_high_score()
+    clock = CLOCK
     game_state = "start"
-    MAX_CATTLE = 8
-    power_up_milestones = {350, 500, 750, 1000}
-    spawned_milestones = set()
-    power_up_active = False
-    last_skull_score = 0
+    recorder = None
+    profiler = overlay = None
+    if PROFILE:
+        profiler = FrameProfiler()
+        profiler.instrument(game)
+        overlay = ProfilerOverlay(profiler, pygame.font.Font(None, 20), SOUNDS)
 
     # Start/restart button for touch
     button_font = pygame.font.Font(None, 40)
+    hud = Hud(font, TEXT_CACHE, WIDTH, WHITE)
+    dirty = DirtyRects(screen, BACKGROUND, enabled=DIRTY_RECTS, layers=PARALLAX)
+    stepper = FixedStep(STEP_SECONDS)
+    interpolator = Interpolator(MAX_BOUNCE_STEP * TICK_SCALE)
+    governor = QualityGovernor(FPS or 60)
+    hud_values = None
+    hud_age = 0
+    touches = []  # kept until a step takes them
+    last_frame = time.perf_counter()
     start_rect = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 + 100, 200, 60)  # For start/restart
+    start_requested = False  # start pressed while sprites were still loading
+
+    def start_game():
+        # From the start or game over screen into a fresh session
+        nonlocal recorder, game_state, touches, start_requested
+        if not ASSETS.ready("play"):
+            start_requested = True  # goes ahead once they are in
+            return
+        start_requested = False
+        game.reset(load_start_score())
+        recorder = start_recording(game)
+        game_state = "play"
+        touches = []
+        stepper.reset()
+        interpolator.clear()
+        dirty.invalidate()
+
+    def on_quit(event):
+        nonlocal running
+        running = False
+        save_high_score(game.high_score)
+        SCORES.close()
+        if LEADERBOARD:
+            LEADERBOARD.close()
+        if recorder:
+            recorder.close()
+        if profiler and PROFILE_DUMP:
+            profiler.dump(PROFILE_DUMP)
+
+    def on_key_down(event):
+        nonlocal profiler, overlay
+        if event.key == pygame.K_F3:
+            if profiler:
+                FrameProfiler.uninstrument(game)
+                profiler = overlay = None
+            else:
+                profiler = FrameProfiler()
+                profiler.instrument(game)
+                profiler.begin_frame()
+                overlay = ProfilerOverlay(profiler, pygame.font.Font(None, 20), SOUNDS)
+        elif event.key == pygame.K_SPACE and game_state != "play":
+            start_game()
+
+    def on_mouse_down(event):
+        if game_state != "play":
+            if start_rect.collidepoint(event.pos):
+                start_game()
+        else:
+            touches.append((TOUCH_DOWN, event.pos))
+
+    def on_mouse_motion(event):
+        # Drags flood the queue with motion; a run of them collapses into
+        # the latest, which is all the player's position depends on
+        if game_state == "play" and event.buttons[0]:
+            if touches and touches[-1][0] == TOUCH_MOVE:
+                touches[-1] = (TOUCH_MOVE, event.pos)
+            else:
+                touches.append((TOUCH_MOVE, event.pos))
+
+    def on_mouse_up(event):
+        if game_state == "play":
+            touches.append((TOUCH_UP, event.pos))
+
+    def on_expose(event):
+        # The window was uncovered or restored and the system may have lost
+        # what was on it; partial updates would leave the rest stale
+        dirty.invalidate()
+
+    handlers = {
+        pygame.QUIT: on_quit,
+        pygame.KEYDOWN: on_key_down,
+        pygame.MOUSEBUTTONDOWN: on_mouse_down,
+        pygame.MOUSEMOTION: on_mouse_motion,
+        pygame.MOUSEBUTTONUP: on_mouse_up,
+        pygame.VIDEOEXPOSE: on_expose,
+        pygame.WINDOWEXPOSED: on_expose,
+        pygame.WINDOWRESTORED: on_expose,
+    }
+    # Nothing else is handled, so nothing else is queued
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(handlers))
 
     # Game loop
     running = True
     while running:
+        if profiler:
+            profiler.begin_frame()
+        frame_start = time.perf_counter()
+        elapsed = frame_start - last_frame
+        last_frame = frame_start
+        steps = 0
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-                save_high_score(high_score)
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                if game_state == "start":
-                    game_state = "play"
-                    score = load_start_score()
-                elif game_state == "game_over":
-                    player = Player()
-                    cattle_list = []
-                    obstacles = []
-                    power_ups = []
-                    skulls = []
-                    occupied_lanes.clear()
-                    score = load_start_score()
-                    lives = 3
-                    spawn_timer = 0
-                    obstacle_spawn_timer = 0
-                    hit_sound_timer = 0
-                    play_time = 0
-                    difficulty = 1.0
-                    spawned_milestones.clear()
-                    power_up_active = False
-                    last_skull_score = 0
-                    game_state = "play"
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pos = event.pos
-                if game_state == "start" or game_state == "game_over":
-                    if start_rect.collidepoint(pos):
-                        if game_state == "start":
-                            game_state = "play"
-                            score = load_start_score()
-                        elif game_state == "game_over":
-                            player = Player()
-                            cattle_list = []
-                            obstacles = []
-                            power_ups = []
-                            skulls = []
-                            occupied_lanes.clear()
-                            score = load_start_score()
-                            lives = 3
-                            spawn_timer = 0
-                            obstacle_spawn_timer = 0
-                            hit_sound_timer = 0
-                            play_time = 0
-                            difficulty = 1.0
-                            spawned_milestones.clear()
-                            power_up_active = False
-                            last_skull_score = 0
-                            game_state = "play"
-                elif game_state == "play":
-                    player.handle_touch_down(pos)
-            if event.type == pygame.MOUSEMOTION and game_state == "play":
-                if pygame.mouse.get_pressed()[0]:
-                    pos = event.pos
-                    player.handle_touch_move(pos)
-            if event.type == pygame.MOUSEBUTTONUP and game_state == "play":
-                pos = event.pos
-                player.handle_touch_up(pos)
+            handler = handlers.get(event.type)
+            if handler:
+                handler(event)
+        if profiler:
+            profiler.lap("events")
+
+        if not ASSETS.done:
+            ASSETS.pump(LOAD_BUDGET)
+            if ASSETS.ready("play") and "first_frame" in ASSETS.marks and "interactive" not in ASSETS.marks:
+                ASSETS.mark("interactive")
+                print(f"Startup: import {ASSETS.marks['import'] * 1000:.0f} ms, "
+                      f"bootstrap {ASSETS.marks['bootstrap'] * 1000:.0f} ms, "
+                      f"first frame {ASSETS.marks['first_frame'] * 1000:.0f} ms, "
+                      f"interactive {ASSETS.marks['interactive'] * 1000:.0f} ms")
+            if start_requested and ASSETS.ready("play"):
+                start_game()
+            if profiler:
+                profiler.lap("load")
 
         if game_state == "start":
-            screen.blit(BACKGROUND, (0, 0))
-            player.draw(game_state)
-            title_text = title_font.render("STAMPEDE", True, LIGHT_BROWN)
+            dirty.clear()
+            dirty.add(draw_player(game.player, game_state))
+            title_text = TEXT_CACHE.render(title_font, "STAMPEDE", LIGHT_BROWN)
             title_rect = title_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
-            screen.blit(title_text, title_rect)
+            dirty.add(screen.blit(title_text, title_rect))
             # Draw start button
-            pygame.draw.rect(screen, GREEN, start_rect)
-            start_text = button_font.render("START", True, BLACK)
+            dirty.add(pygame.draw.rect(screen, GREEN, start_rect))
+            label = "START" if ASSETS.ready("play") else f"LOADING {ASSETS.progress():.0%}"
+            start_text = TEXT_CACHE.render(button_font, label, BLACK)
             screen.blit(start_text, start_text.get_rect(center=start_rect.center))
         elif game_state == "play":
-            play_time += 1
-
-            spawn_timer += 1
-            spawn_rate = max(30, int(60 / difficulty))
-            if spawn_timer >= spawn_rate and len(cattle_list) < MAX_CATTLE:
-                roll = random.random()
-                if score >= 400:
-                    fastest_chance = min(0.3, 0.1 + 0.2 * (play_time - 1800) / 1800) if play_time > 1800 else 0.1
-                    if roll < fastest_chance:
-                        new_cattle = Cattle("fastest")
-                    elif roll < fastest_chance + 0.4:
-                        new_cattle = Cattle("fast")
-                    else:
-                        new_cattle = Cattle("slow")
-                else:
-                    fast_chance = min(0.4, 0.4 * max(0, play_time - 900) / 900) if play_time > 900 else 0.0
-                    new_cattle = Cattle("fast" if roll < fast_chance else "slow")
-                if new_cattle.y >= 0:
-                    cattle_list.append(new_cattle)
-                spawn_timer = 0
-                difficulty = min(difficulty + 0.01, 2.5)
-
-            for milestone in power_up_milestones:
-                if score >= milestone and milestone not in spawned_milestones:
-                    new_power_up = PowerUp()
-                    if new_power_up.y >= 0:
-                        power_ups.append(new_power_up)
-                        spawned_milestones.add(milestone)
-                        power_up_active = True
-                        HIT_SOUND.stop()
-
-            obstacle_spawn_timer += 1
-            if obstacle_spawn_timer >= 180:
-                new_obstacle = Obstacle()
-                if new_obstacle.y >= 0:
-                    obstacles.append(new_obstacle)
-                obstacle_spawn_timer = 0
-
-            if score >= last_skull_score + 250 and not any(s.x > WIDTH - 100 for s in skulls):
-                new_skull = Skull()
-                if new_skull.y >= 0:
-                    skulls.append(new_skull)
-                    last_skull_score = score
-
-            if len(cattle_list) > 0 and not power_up_active:
-                hit_sound_timer += 1
-                if hit_sound_timer >= hit_sound_interval:
-                    HIT_SOUND.play()
-                    hit_sound_interval = random.randint(120, 240)
-                    hit_sound_timer = 0
-
-            player.move()
-            
-            for cattle in cattle_list[:]:
-                cattle.move()
-                if player.lassolength > 0:
-                    lasso_end_x = player.x + player.width + player.lassolength
-                    lasso_end_y = player.y + 10 + (30 * player.lassolength / player.lassomax)
-                    lasso_end = (lasso_end_x, lasso_end_y)
-                    cattle_rect = pygame.Rect(cattle.x, cattle.y, cattle.width, cattle.height)
-                    if cattle_rect.clipline((player.x + player.width, player.y + 10), lasso_end):
-                        score += cattle.points
-                        high_score = max(high_score, score)
-                        cattle.remove()
-                        cattle_list.remove(cattle)
-                        POINT_SOUND.play()
-                        continue
-                if (cattle.x < player.x + player.width and 
-                    cattle.y < player.y + player.height and 
-                    cattle.y + cattle.height > player.y and 
-                    not cattle.hit_cowboy):
-                    cattle.hit_cowboy = True
-                    continue
-                if cattle.x < 0 and not cattle.hit_cowboy:
-                    lives -= 1
-                    cattle.remove()
-                    cattle_list.remove(cattle)
-                    HIT_SOUND.play()
-
-            for power_up in power_ups[:]:
-                power_up.move()
-                if player.lassolength > 0:
-                    lasso_end_x = player.x + player.width + player.lassolength
-                    lasso_end_y = player.y + 10 + (30 * player.lassolength / player.lassomax)
-                    lasso_end = (lasso_end_x, lasso_end_y)
-                    power_up_rect = pygame.Rect(power_up.x, power_up.y, power_up.width, power_up.height)
-                    if power_up_rect.clipline((player.x + player.width, player.y + 10), lasso_end):
-                        lives += 1
-                        power_up.remove()
-                        power_ups.remove(power_up)
-                        if not power_ups:
-                            power_up_active = False
-                        LASSO_SOUND.stop()
-                        POINT_SOUND.stop()
-                        HIT_SOUND.stop()
-                        YEHA_CHANNEL.play(YEHA_SOUND)
-                        continue
-                if power_up.x < -power_up.width:
-                    power_up.remove()
-                    power_ups.remove(power_up)
-                    if not power_ups:
-                        power_up_active = False
-
-            for obstacle in obstacles[:]:
-                obstacle.move()
-                if (obstacle.x < player.x + player.width and 
-                    obstacle.x + obstacle.width > player.x and
-                    obstacle.y < player.y + player.height and 
-                    obstacle.y + obstacle.height > player.y):
-                    lives -= 1
-                    obstacle.remove()
-                    obstacles.remove(obstacle)
-                    if not power_up_active:
-                        HIT_SOUND.play()
-                if obstacle.x < -obstacle.width:
-                    obstacle.remove()
-                    obstacles.remove(obstacle)
-
-            for skull in skulls[:]:
-                skull.move()
-                if (skull.x < player.x + player.width and 
-                    skull.x + skull.width > player.x and
-                    skull.y < player.y + player.height and 
-                    skull.y + skull.height > player.y):
-                    lives -= 1
-                    skull.remove()
-                    skulls.remove(skull)
-                    if not power_up_active:
-                        HIT_SOUND.play()
-                elif skull.x < -skull.width:
-                    skull.remove()
-                    skulls.remove(skull)
-
-            if lives <= 0:
+            # Run as many fixed steps as the time since the last frame
+            # covers; touches go to the first of them, held keys to each
+            steps = stepper.advance(elapsed)
+            for _ in range(steps):
+                inputs = read_inputs(touches)
+                touches = []
+                interpolator.capture(game)
+                play_sounds(game.step(inputs))
+                PARALLAX.scroll(GROUND_SPEED * game.difficulty * game.tick_scale)
+                if recorder:
+                    recorder.record(inputs, game)
+                if game.over:
+                    break
+            if profiler:
+                profiler.lap("update")
+
+            if game.over:
                 game_state = "game_over"
-                save_high_score(high_score)
-
-            screen.blit(BACKGROUND, (0, 0))
-            player.draw(game_state)
-            for cattle in cattle_list:
-                cattle.draw()
-            for power_up in power_ups:
-                power_up.draw()
-            for obstacle in obstacles:
-                obstacle.draw()
-            for skull in skulls:
-                skull.draw()
-
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            high_score_text = font.render(f"High: {high_score}", True, WHITE)
-            lives_text = font.render(f"Lives: {lives}", True, WHITE)
-            spacing = 50
-            total_width = score_text.get_width() + high_score_text.get_width() + lives_text.get_width() + 2 * spacing
-            start_x = (WIDTH - total_width) // 2
-            screen.blit(score_text, (start_x, 10))
-            screen.blit(high_score_text, (start_x + score_text.get_width() + spacing, 10))
-            screen.blit(lives_text, (start_x + score_text.get_width() + high_score_text.get_width() + 2 * spacing, 10))
+                touches = []
+                dirty.invalidate()
+                SCORES.record(game.score, seed=game.seed, ticks=game.play_time)
+                if LEADERBOARD:
+                    LEADERBOARD.record(game)
+                if recorder:
+                    recorder.close()
+                    recorder = None
+
+            player_y = None
+            smooth = game_state == "play" and not governor.dropped("interpolation")
+            alpha = stepper.alpha
+            if smooth:
+                player_y = interpolator.player_y_at(game.player, alpha)
+            dirty.clear(alpha if smooth else 1.0)
+            dirty.add(draw_player(game.player, "play", player_y, governor.dropped("lasso")))
+            for entity in game.entities():
+                dirty.add(draw_entity(entity, interpolator.entity_x(entity, alpha) if smooth else None))
+            hud_age += 1
+            if hud_values is None or not governor.dropped("hud") or hud_age >= HUD_REFRESH_FRAMES:
+                hud_values = (game.score, game.high_score, game.lives)
+                hud_age = 0
+            dirty.add(hud.draw(screen, *hud_values))
 
         elif game_state == "game_over":
-            screen.blit(BACKGROUND, (0, 0))
-            player.draw("play")
-            for entity in cattle_list + power_ups + obstacles + skulls:
-                entity.draw()
-
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            high_score_text = font.render(f"High: {high_score}", True, WHITE)
-            lives_text = font.render(f"Lives: {lives}", True, WHITE)
-            spacing = 50
-            total_width = score_text.get_width() + high_score_text.get_width() + lives_text.get_width() + 2 * spacing
-            start_x = (WIDTH - total_width) // 2
-            screen.blit(score_text, (start_x, 10))
-            screen.blit(high_score_text, (start_x + score_text.get_width() + spacing, 10))
-            screen.blit(lives_text, (start_x + score_text.get_width() + high_score_text.get_width() + 2 * spacing, 10))
-
-            game_over_text = game_over_font.render("GAME OVER", True, WHITE)
-            screen.blit(game_over_text, game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 25)))
+            dirty.clear()
+            dirty.add(draw_player(game.player, "play"))
+            for entity in game.entities():
+                dirty.add(draw_entity(entity))
+            dirty.add(hud.draw(screen, game.score, game.high_score, game.lives))
+
+            game_over_text = TEXT_CACHE.render(game_over_font, "GAME OVER", WHITE)
+            dirty.add(screen.blit(game_over_text, game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 25))))
 
             # Draw restart button
-            pygame.draw.rect(screen, GREEN, start_rect)
-            restart_text = button_font.render("RESTART", True, BLACK)
+            dirty.add(pygame.draw.rect(screen, GREEN, start_rect))
+            restart_text = TEXT_CACHE.render(button_font, "RESTART", BLACK)
             screen.blit(restart_text, restart_text.get_rect(center=start_rect.center))
 
-        pygame.display.flip()
-        clock.tick(60)
+        if profiler:
+            profiler.set("entities", len(game.entities()))
+            profiler.set("lanes", game.lanes.mask.bit_count())
+            profiler.set("steps", steps)
+            profiler.set("quality", governor.level)
+            profiler.lap("draw")
+            for rect in overlay.draw(screen, game):
+                dirty.add(rect)
+            profiler.lap("overlay")
+        dirty.present()
+        ASSETS.mark("first_frame")
+        if profiler:
+            profiler.lap("flip")
+        governor.record(time.perf_counter() - frame_start)
+        clock.tick(FPS)
         await asyncio.sleep(0)
 
     pygame.quit()
 
-asyncio.run(main())
\ No newline at end of file
+ASSETS.mark("import")
+
+if __name__ == "__main__":
+    asyncio.run(main())
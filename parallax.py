@@ -0,0 +1,52 @@
+"""Scrolling parallax background.
+
+The desert background is mostly a flat field with a fence along the top and
+the bottom. ParallaxBackground leaves the field as it is and scrolls each
+fence band at its own speed: the far (top) fence slower than the near
+(bottom) one. Each band is cut out of the background once and pre-rendered
+twice side by side into a strip twice the screen's width, in the display's
+format, so drawing it at any scroll offset is a single sub-rect blit with
+no seam to split.
+
+Only the bands change from frame to frame, so DirtyRects (see
+dirty_rects.py) redraws and updates just those rects plus whatever sprites
+moved, and restores the rest from the unchanged background: a few bands of
+the screen per frame instead of the whole 800x600.
+
+scroll(pixels) moves the ground by pixels, each band by pixels times its
+speed; draw(screen, alpha) draws the bands alpha of the way from the last
+scroll to the current one, for drawing between fixed steps.
+"""
+import pygame
+
+
+class ParallaxBackground:
+    def __init__(self, background, layers):
+        # layers: (y, height, speed) for each band of background that scrolls
+        self.background = background
+        self.width = background.get_width()
+        self.strips = []
+        self.rects = []
+        self.speeds = []
+        for y, height, speed in layers:
+            band = background.subsurface((0, y, self.width, height))
+            strip = pygame.Surface((self.width * 2, height)).convert(background)
+            strip.blit(band, (0, 0))
+            strip.blit(band, (self.width, 0))
+            self.strips.append(strip)
+            self.rects.append(pygame.Rect(0, y, self.width, height))
+            self.speeds.append(speed)
+        self.offsets = [0.0] * len(self.strips)
+        self.steps = [0.0] * len(self.strips)  # distance moved by the last scroll
+
+    def scroll(self, pixels):
+        for i, speed in enumerate(self.speeds):
+            self.steps[i] = pixels * speed
+            self.offsets[i] = (self.offsets[i] + self.steps[i]) % self.width
+
+    def draw(self, screen, alpha=1.0):
+        # Returns the rects drawn
+        for strip, rect, offset, step in zip(self.strips, self.rects, self.offsets, self.steps):
+            x = int(offset - step * (1 - alpha)) % self.width
+            screen.blit(strip, rect, (x, 0, rect.width, rect.height))
+        return self.rects
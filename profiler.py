@@ -0,0 +1,165 @@
+"""Opt-in frame-time profiler for the main loop.
+
+FrameProfiler keeps the last `capacity` frames in a preallocated ring
+buffer, one row of per-phase durations (milliseconds) per frame:
+
+    frame      wall time since the previous frame started (what the player sees)
+    events     pygame event handling
+    load       asset loading between frames (assets.AssetLoader.pump)
+    update     the frame's Game.step calls, split further into their phases:
+               spawn, player, movement (the single pass over every entity)
+    draw       the blit pass
+    overlay    drawing this profiler's own overlay, kept out of draw
+    flip       pygame.display.flip
+    entities   live entity count
+    lanes      lanes not taking spawns
+    steps      Game.step calls this frame (frame_loop.FixedStep)
+    quality    frame_loop.QualityGovernor level, 0 for full quality
+
+main.py only creates a profiler when profiling is switched on, and the game
+phases are timed by wrapping the bound methods of that one Game instance, so
+a game that is not being profiled runs exactly the code it always did.
+"""
+import json
+import time
+from array import array
+
+from stats import percentile
+
+COLUMNS = ("frame", "events", "load", "update", "spawn", "player", "movement",
+           "draw", "overlay", "flip", "entities", "lanes", "steps", "quality")
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# Game.step phases and the column each is timed into
+GAME_PHASES = {
+    "spawn": "spawn",
+    "update_player": "player",
+    "update_entities": "movement",
+}
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, clock=time.perf_counter):
+        self.capacity = capacity
+        self.clock = clock
+        self.width = len(COLUMNS)
+        self.rows = array("d", bytes(8 * capacity * self.width))
+        self.count = 0  # frames recorded so far, including overwritten ones
+        self.row = 0
+        self.frame_start = None
+        self.lap_start = None
+
+    def begin_frame(self):
+        now = self.clock()
+        if self.frame_start is not None:
+            self.rows[self.row * self.width] = (now - self.frame_start) * 1000
+            self.count += 1
+        self.row = self.count % self.capacity
+        base = self.row * self.width
+        for i in range(base, base + self.width):
+            self.rows[i] = 0.0
+        self.frame_start = self.lap_start = now
+
+    def lap(self, column):
+        # Time since the previous lap (or frame start) goes into column
+        now = self.clock()
+        self.rows[self.row * self.width + COLUMN_INDEX[column]] += (now - self.lap_start) * 1000
+        self.lap_start = now
+
+    def set(self, column, value):
+        self.rows[self.row * self.width + COLUMN_INDEX[column]] = value
+
+    def instrument(self, game):
+        # Shadow the phase methods on this instance with timed wrappers
+        for method, column in GAME_PHASES.items():
+            setattr(game, method, self._timed(getattr(game, method), COLUMN_INDEX[column]))
+
+    @staticmethod
+    def uninstrument(game):
+        for method in GAME_PHASES:
+            game.__dict__.pop(method, None)
+
+    def _timed(self, func, column):
+        clock = self.clock
+
+        def timed(*args):
+            start = clock()
+            result = func(*args)
+            self.rows[self.row * self.width + column] += (clock() - start) * 1000
+            return result
+        return timed
+
+    def frames(self):
+        # Completed frames, oldest first, as lists of column values
+        n = min(self.count, self.capacity)
+        first = self.count - n
+        w = self.width
+        return [list(self.rows[(i % self.capacity) * w:(i % self.capacity + 1) * w])
+                for i in range(first, self.count)]
+
+    def summary(self):
+        frames = self.frames()
+        result = {"frames": len(frames)}
+        for i, name in enumerate(COLUMNS):
+            column = sorted(f[i] for f in frames)
+            result[name] = {"p50": percentile(column, 50), "p99": percentile(column, 99),
+                            "max": max(column, default=0.0)}
+        return result
+
+    def dump(self, path):
+        # .json gets the summary and every frame, anything else is CSV
+        frames = self.frames()
+        with open(path, "w") as file:
+            if path.endswith(".json"):
+                json.dump({"columns": COLUMNS, "summary": self.summary(), "frames": frames}, file)
+            else:
+                file.write(",".join(COLUMNS) + "\n")
+                for frame in frames:
+                    file.write(",".join(f"{v:.4f}" for v in frame) + "\n")
+
+
+# Text overlay of the profiler's recent history, refreshed a few times a second
+class ProfilerOverlay:
+    def __init__(self, profiler, font, sounds=None, refresh_frames=30, color=(255, 255, 0)):
+        self.profiler = profiler
+        self.sounds = sounds  # audio.SoundManager, for its counters
+        self.font = font
+        self.refresh_frames = refresh_frames
+        self.color = color
+        self.surfaces = []
+        self.age = refresh_frames
+
+    def lines(self, game):
+        s = self.profiler.summary()
+        counts = game.store.counts
+        lanes = game.lanes.stats()
+        phases = "  ".join(f"{name} {s[name]['p50']:.2f}" for name in COLUMNS[1:COLUMN_INDEX["entities"]])
+        lines = [
+            f"frame p50 {s['frame']['p50']:.1f} ms  p99 {s['frame']['p99']:.1f} ms  "
+            f"max {s['frame']['max']:.1f} ms  ({s['frames']} frames)",
+            f"p50 ms: {phases}",
+            f"cattle {game.store.cattle_count()}  power-ups {counts['power_up']}  "
+            f"obstacles {counts['obstacle']}  skulls {counts['skull']}  pool high water "
+            + " ".join(str(stats["high_water"]) for stats in game.pool_stats().values()),
+            f"lanes taken {lanes['taken']}/{lanes['lanes']}  claims {lanes['claims']}  "
+            f"failed {lanes['failed']}  early releases {lanes['early_releases']}",
+        ]
+        if self.sounds:
+            audio = self.sounds.stats()
+            lines.append(f"audio voices {audio['busy']}/{audio['voices']}  played {audio['played']}  "
+                         f"rate limited {audio['rate_limited']}  stolen {audio['stolen']}  "
+                         f"dropped {audio['dropped']}")
+        return lines
+
+    def draw(self, screen, game):
+        self.age += 1
+        if self.age >= self.refresh_frames:
+            self.age = 0
+            self.surfaces = [self.font.render(line, True, self.color) for line in self.lines(game)]
+        # Returns the rects drawn over, for partial screen updates
+        rects = []
+        y = screen.get_height() - 4
+        for surface in reversed(self.surfaces):
+            y -= surface.get_height()
+            rects.append(screen.blit(surface, (4, y)))
+        return rects
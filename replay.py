@@ -0,0 +1,223 @@
+"""Input logs for Stampede sessions and headless replay.
+
+A session is fully determined by its seed, its start score, its Game
+settings and the Inputs fed to each tick, so that is all a log stores:
+
+    header  b"STPL", version u8, JSON length u16, JSON {seed, score, settings}
+    records, each starting with a tag byte:
+      RUN    flags u8, count varint     same key state, no touches, for count ticks
+      TOUCH  flags u8, n u8, n * (phase u8, x i16, y i16)     one tick
+      CHECK  tick delta varint, crc32 u32     Game.digest() after that tick
+
+Key flags are bit 0 up, bit 1 down, bit 2 lasso. Held keys collapse into
+RUN records, so idle or steady play costs a few bytes per second plus one
+CHECK per checked tick.
+
+    python replay.py session.stpl             replay and check every digest
+    python replay.py session.stpl --repeat 20 benchmark the replay
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+
+import simulation
+
+MAGIC = b"STPL"
+VERSION = 2  # 2: Game.digest() visits entities in lane order
+
+TAG_RUN = 1
+TAG_TOUCH = 2
+TAG_CHECK = 3
+
+UP = 1
+DOWN = 2
+LASSO = 4
+
+TOUCH_PHASES = (simulation.TOUCH_DOWN, simulation.TOUCH_MOVE, simulation.TOUCH_UP)
+TOUCH_CODES = {phase: code for code, phase in enumerate(TOUCH_PHASES)}
+TOUCH = struct.Struct("<Bhh")
+
+
+class ReplayDivergence(Exception):
+    def __init__(self, tick, expected, actual):
+        super().__init__(f"state diverged at tick {tick}: expected {expected:08x}, got {actual:08x}")
+        self.tick = tick
+        self.expected = expected
+        self.actual = actual
+
+
+def _write_varint(buf, value):
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _flags(inputs):
+    return (UP if inputs.up else 0) | (DOWN if inputs.down else 0) | (LASSO if inputs.lasso else 0)
+
+
+# Records the inputs of one session, as fed to Game.step, into a log file
+class InputRecorder:
+    def __init__(self, path, game, check_every=1):
+        self.file = open(path, "wb")
+        self.check_every = check_every
+        self.tick = 0
+        self.last_check = 0
+        self.run_flags = None
+        self.run_count = 0
+        header = json.dumps({"seed": game.seed, "score": game.start_score,
+                             "settings": game.settings()}).encode()
+        self.file.write(MAGIC + struct.pack("<BH", VERSION, len(header)) + header)
+
+    def _flush_run(self, buf):
+        if self.run_count:
+            buf += bytes((TAG_RUN, self.run_flags))
+            _write_varint(buf, self.run_count)
+            self.run_count = 0
+
+    def record(self, inputs, game):
+        # Call after game.step(inputs) so the check sees the resulting state
+        buf = bytearray()
+        flags = _flags(inputs)
+        self.tick += 1
+        if inputs.touches:
+            self._flush_run(buf)
+            buf += bytes((TAG_TOUCH, flags, len(inputs.touches)))
+            for phase, (x, y) in inputs.touches:
+                buf += TOUCH.pack(TOUCH_CODES[phase], x, y)
+        else:
+            if flags != self.run_flags:
+                self._flush_run(buf)
+                self.run_flags = flags
+            self.run_count += 1
+        if self.check_every and self.tick % self.check_every == 0:
+            # Checks carry their own tick, so they need not wait for the run
+            buf.append(TAG_CHECK)
+            _write_varint(buf, self.tick - self.last_check)
+            buf += struct.pack("<I", game.digest())
+            self.last_check = self.tick
+        if buf:
+            self.file.write(buf)
+
+    def close(self):
+        buf = bytearray()
+        self._flush_run(buf)
+        self.file.write(buf)
+        self.file.close()
+
+
+# A decoded log: header fields, one Inputs per tick and {tick: digest}
+class InputLog:
+    def __init__(self, seed, score, settings, inputs, checks):
+        self.seed = seed
+        self.score = score
+        self.settings = settings
+        self.inputs = inputs
+        self.checks = checks
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a Stampede input log")
+        version, length = struct.unpack_from("<BH", data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported log version {version}")
+        pos = 7 + length
+        header = json.loads(data[7:pos])
+        inputs = []
+        checks = {}
+        check_tick = 0
+        # Tick inputs are immutable, so runs share one Inputs per key state
+        by_flags = {}
+        while pos < len(data):
+            tag = data[pos]
+            if tag == TAG_RUN:
+                flags = data[pos + 1]
+                count, pos = _read_varint(data, pos + 2)
+                if flags not in by_flags:
+                    by_flags[flags] = simulation.Inputs(bool(flags & UP), bool(flags & DOWN),
+                                                        bool(flags & LASSO))
+                inputs.extend([by_flags[flags]] * count)
+            elif tag == TAG_TOUCH:
+                flags, n = data[pos + 1], data[pos + 2]
+                pos += 3
+                touches = []
+                for _ in range(n):
+                    code, x, y = TOUCH.unpack_from(data, pos)
+                    touches.append((TOUCH_PHASES[code], (x, y)))
+                    pos += TOUCH.size
+                inputs.append(simulation.Inputs(bool(flags & UP), bool(flags & DOWN),
+                                                bool(flags & LASSO), touches))
+            elif tag == TAG_CHECK:
+                delta, pos = _read_varint(data, pos + 1)
+                check_tick += delta
+                checks[check_tick] = struct.unpack_from("<I", data, pos)[0]
+                pos += 4
+            else:
+                raise ValueError(f"{path}: unknown record tag {tag} at byte {pos}")
+        return cls(header["seed"], header["score"], header["settings"], inputs, checks)
+
+    def new_game(self):
+        game = simulation.Game(seed=self.seed, **self.settings)
+        if self.score:
+            game.reset(self.score, self.seed)
+        return game
+
+
+def replay(log, check=True):
+    # Replays a log as fast as possible; returns the final Game.
+    # Raises ReplayDivergence at the first tick whose digest differs.
+    game = log.new_game()
+    checks = log.checks if check else {}
+    step = game.step
+    for tick, inputs in enumerate(log.inputs, 1):
+        step(inputs)
+        expected = checks.get(tick)
+        if expected is not None:
+            actual = game.digest()
+            if actual != expected:
+                raise ReplayDivergence(tick, expected, actual)
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Stampede session headlessly.")
+    parser.add_argument("log", help="input log written by InputRecorder")
+    parser.add_argument("--no-check", action="store_true", help="skip digest comparison")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times and report speed")
+    args = parser.parse_args(argv)
+
+    log = InputLog.load(args.log)
+    started = time.perf_counter()
+    try:
+        for _ in range(args.repeat):
+            game = replay(log, check=not args.no_check)
+    except ReplayDivergence as e:
+        print(e)
+        return 1
+    elapsed = time.perf_counter() - started
+    ticks = len(log.inputs) * args.repeat
+    print(f"{len(log.inputs)} ticks, {len(log.checks)} checks passed, final score {game.score}, "
+          f"lives {game.lives}")
+    print(f"{ticks} ticks in {elapsed:.3f}s ({ticks / elapsed:.0f} ticks/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
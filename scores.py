@@ -0,0 +1,176 @@
+"""High score and recent best runs, saved without blocking the game loop.
+
+ScoreStore keeps the scores in memory and writes them as one small JSON
+document through a backend:
+
+    FileBackend          a file, written to a temporary file and renamed
+                         over the old one, so a crash never leaves half a file
+    LocalStorageBackend  the browser's window.localStorage (the web build)
+
+Desktop writes happen on one background thread. A save requested while a
+write is in flight only marks the store dirty; the writer picks up the
+latest state when it finishes, so any number of saves in a burst costs at
+most two writes. The web build has no threads, and localStorage is a fast
+synchronous call anyway, so it writes inline.
+
+Besides the high score the document holds the top_n best runs with a little
+metadata each, so its size is bounded however long the game is played.
+Scores saved by older versions (a bare number) are read as the high score.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCORES_VERSION = 1
+TOP_N = 10
+
+
+class FileBackend:
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path  # read when path does not exist yet
+
+    def read(self):
+        for path in (self.path, self.legacy_path):
+            if not path:
+                continue
+            try:
+                with open(path) as file:
+                    return file.read()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".scores-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+
+class LocalStorageBackend:
+    def __init__(self, storage, key, legacy_key=None):
+        self.storage = storage  # window.localStorage
+        self.key = key
+        self.legacy_key = legacy_key
+
+    def read(self):
+        for key in (self.key, self.legacy_key):
+            if key:
+                value = self.storage.getItem(key)
+                if value:
+                    return value
+        return None
+
+    def write(self, text):
+        self.storage.setItem(self.key, text)
+
+
+class ScoreStore:
+    def __init__(self, backend, top_n=TOP_N, background=True):
+        self.backend = backend
+        self.top_n = top_n
+        self.high_score = 0
+        self.top = []  # best runs first, each {"score": ..., metadata}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.writing = False
+        self.executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self.requests = 0  # saves asked for
+        self.writes = 0  # saves that reached the backend
+        self.errors = 0
+
+    def load(self):
+        # Synchronous: one small read at startup. Unreadable data counts as empty.
+        try:
+            text = self.backend.read()
+        except Exception as e:
+            print(f"Scores not loaded: {e}")
+            text = None
+        self.high_score, self.top = 0, []
+        if text:
+            try:
+                data = json.loads(text)
+                if isinstance(data, dict):
+                    self.high_score = int(data.get("high_score", 0))
+                    self.top = [run for run in data.get("top", []) if isinstance(run, dict)][:self.top_n]
+                else:
+                    self.high_score = int(data)  # a bare number from older versions
+            except (ValueError, TypeError):
+                pass
+        return self.high_score
+
+    def set_high_score(self, score):
+        with self.lock:
+            if score <= self.high_score:
+                return
+            self.high_score = score
+        self.save()
+
+    def record(self, score, **metadata):
+        # A finished run: keeps it if it is among the top_n and saves
+        with self.lock:
+            self.high_score = max(self.high_score, score)
+            run = {"score": score, "time": int(time.time())}
+            run.update(metadata)
+            self.top.append(run)
+            self.top.sort(key=lambda r: -r["score"])  # stable: earlier runs win ties
+            del self.top[self.top_n:]
+        self.save()
+
+    def document(self):
+        return json.dumps({"version": SCORES_VERSION, "high_score": self.high_score, "top": self.top})
+
+    def save(self):
+        self.requests += 1
+        if self.executor is None:
+            self._write(self.document())
+            return
+        with self.lock:
+            self.dirty = True
+            if self.writing:
+                return  # the running writer will pick this up
+            self.writing = True
+        self.executor.submit(self._drain)
+
+    def _drain(self):
+        # Writer thread: keep writing the latest state until nothing changed
+        while True:
+            with self.lock:
+                if not self.dirty:
+                    self.writing = False
+                    return
+                self.dirty = False
+                text = self.document()
+            self._write(text)
+
+    def _write(self, text):
+        try:
+            self.backend.write(text)
+            self.writes += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Scores not saved: {e}")
+
+    def flush(self):
+        # Blocks until every requested save has been written
+        if self.executor is not None:
+            self.executor.submit(lambda: None).result()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
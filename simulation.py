@@ -0,0 +1,921 @@
+"""Headless Stampede game rules.
+
+Everything that happens during "play" lives here: spawning, movement,
+lasso/collision resolution, lives and score. The state only advances through
+Game.step(inputs), one call per 60 Hz frame (or per tick_scale frames, see
+Game), and nothing in this module touches the display, so it can run as
+fast as the CPU allows.
+"""
+import math
+import random
+import struct
+import zlib
+
+from lanes import LaneAllocator, LaneIndex
+from swept import sweep_boxes, sweep_segment_box
+
+# Screen setup
+WIDTH = 800
+HEIGHT = 600
+
+# Gameplay boundaries
+TOP_LIMIT = 100
+BOTTOM_LIMIT = 500
+LANE_SPACING = 50
+LANES = [TOP_LIMIT + i * LANE_SPACING for i in range((BOTTOM_LIMIT - TOP_LIMIT) // LANE_SPACING)]
+
+# Game rules
+START_LIVES = 3
+MAX_CATTLE = 8
+POWER_UP_MILESTONES = {350, 500, 750, 1000}
+SKULL_SCORE_STEP = 250
+OBSTACLE_SPAWN_INTERVAL = 180
+
+# Lasso geometry. The rope leaves the cowboy at LASSO_ORIGIN (relative to
+# the player's top-left), starts 1 long when thrown and grows LASSO_STEP a
+# tick until it passes LASSO_MAX, dropping LASSO_DROP over LASSO_MAX, so it
+# only ever has the lengths in LASSO_LENGTHS. LASSO_END holds the end of the
+# rope for each of them, relative to the player's top-left.
+LASSO_ORIGIN = (80, 10)
+LASSO_MAX = 180
+LASSO_STEP = 15
+LASSO_DROP = 30
+LASSO_ANGLE = math.degrees(math.atan2(LASSO_DROP, LASSO_MAX))
+LASSO_LENGTHS = tuple(range(1, LASSO_MAX + LASSO_STEP + 1, LASSO_STEP))
+LASSO_END = {
+    length: (LASSO_ORIGIN[0] + length, LASSO_ORIGIN[1] + LASSO_DROP * length / LASSO_MAX)
+    for length in LASSO_LENGTHS
+}
+
+# Entity kinds, as stored in each entity's kind attribute
+KINDS = ("slow", "fast", "fastest", "power_up", "obstacle", "skull")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# Sound events emitted by Game.step, in the order they happened
+SOUND_LASSO = "lasso"
+SOUND_POINT = "point"
+SOUND_HIT = "hit"
+SOUND_HIT_STOP = "hit_stop"
+SOUND_YEHA = "yeha"
+
+# Touch phases
+TOUCH_DOWN = "down"
+TOUCH_MOVE = "move"
+TOUCH_UP = "up"
+
+
+def _c_div(a, b):
+    # C integer division, truncating toward zero
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+
+def _outcode(x, y, left, top, right, bottom):
+    return (x < left) | (y < top) << 1 | (y > bottom) << 2 | (x > right) << 3
+
+
+def clipline_hits(x, y, width, height, start, end):
+    # bool(pygame.Rect(x, y, width, height).clipline(start, end)) for a rect
+    # of positive size, without pygame: SDL's integer Cohen-Sutherland
+    # clipper, with coordinates truncated as pygame truncates them
+    left, top = int(x), int(y)
+    right, bottom = left + width - 1, top + height - 1
+    x1, y1, x2, y2 = int(start[0]), int(start[1]), int(end[0]), int(end[1])
+    code1 = _outcode(x1, y1, left, top, right, bottom)
+    code2 = _outcode(x2, y2, left, top, right, bottom)
+    while code1 or code2:
+        if code1 & code2:
+            return False
+        code = code1 or code2
+        if code & 2:
+            cx, cy = x1 + _c_div((x2 - x1) * (top - y1), y2 - y1), top
+        elif code & 4:
+            cx, cy = x1 + _c_div((x2 - x1) * (bottom - y1), y2 - y1), bottom
+        elif code & 1:
+            cx, cy = left, y1 + _c_div((y2 - y1) * (left - x1), x2 - x1)
+        else:
+            cx, cy = right, y1 + _c_div((y2 - y1) * (right - x1), x2 - x1)
+        if code1:
+            x1, y1 = cx, cy
+            code1 = _outcode(x1, y1, left, top, right, bottom)
+        else:
+            x2, y2 = cx, cy
+            code2 = _outcode(x2, y2, left, top, right, bottom)
+    return True
+
+
+# Input for a single tick
+class Inputs:
+    def __init__(self, up=False, down=False, lasso=False, touches=()):
+        self.up = up
+        self.down = down
+        self.lasso = lasso
+        self.touches = touches  # sequence of (TOUCH_*, pos) in arrival order
+
+
+NO_INPUT = Inputs()
+
+
+# Player class
+class Player:
+    def __init__(self):
+        self.width = 80
+        self.height = 80
+        self.x = 50
+        self.y = (TOP_LIMIT + BOTTOM_LIMIT) // 2
+        self.speed = 10
+        self.lassolength = 0
+        self.lassomax = LASSO_MAX
+        self.lasso_loop_radius = 15
+        self.frame_index = 0
+        self.frame_timer = 0
+        self.lasso_active = False
+        self.touch_start_pos = None
+        self.is_dragging = False
+        self.fixed_angle = LASSO_ANGLE
+
+    def throw_lasso(self):
+        if self.lassolength == 0:
+            self.lassolength = 1
+            self.lasso_active = True
+            return True
+        return False
+
+    def lasso_start(self):
+        return (self.x + LASSO_ORIGIN[0], self.y + LASSO_ORIGIN[1])
+
+    def lasso_end(self):
+        dx, dy = LASSO_END[self.lassolength]
+        return (self.x + dx, self.y + dy)
+
+    def handle_touch_down(self, pos):
+        self.touch_start_pos = pos
+        self.is_dragging = False
+
+    def handle_touch_move(self, pos):
+        if self.touch_start_pos:
+            dx = abs(pos[0] - self.touch_start_pos[0])
+            dy = abs(pos[1] - self.touch_start_pos[1])
+            if dy > 10 or dx > 10:  # Threshold to detect drag
+                self.is_dragging = True
+            if self.is_dragging:
+                target_y = pos[1] - self.height // 2
+                self.y = max(TOP_LIMIT, min(target_y, BOTTOM_LIMIT - self.height))
+
+    def handle_touch_up(self, pos):
+        # Returns True when the touch was a tap that threw the lasso
+        thrown = False
+        if self.touch_start_pos and not self.is_dragging:
+            thrown = self.throw_lasso()
+        self.touch_start_pos = None
+        self.is_dragging = False
+        return thrown
+
+    def move(self, inputs):
+        # Returns True when the lasso key threw the lasso this tick
+        thrown = False
+        if inputs.up and self.y > TOP_LIMIT:
+            self.y -= self.speed
+        if inputs.down and self.y < BOTTOM_LIMIT - self.height:
+            self.y += self.speed
+        if inputs.lasso:
+            thrown = self.throw_lasso()
+
+        # Lasso extension logic
+        if self.lasso_active:
+            if self.lassolength < self.lassomax:
+                self.lassolength += LASSO_STEP
+            else:
+                self.lassolength = 0
+                self.lasso_active = False
+
+        self.frame_timer += 1
+        if self.frame_timer >= 10:
+            self.frame_timer = 0
+            self.frame_index = (self.frame_index + 1) % 2
+        return thrown
+
+
+# Per-kind tables. Cattle draw their speed from SPEED_RANGES when spawned,
+# everything else moves at a fixed speed.
+CATTLE_KINDS = ("slow", "fast", "fastest")
+LASSO_TARGETS = CATTLE_KINDS + ("power_up",)
+KIND_SIZE = {
+    "slow": (100, 60),
+    "fast": (100, 60),
+    "fastest": (100, 60),
+    "power_up": (100, 60),
+    "obstacle": (25, 25),
+    "skull": (50, 50),
+}
+KIND_POINTS = {"slow": 5, "fast": 10, "fastest": 15}
+SPEED_RANGES = {"slow": (2.5, 3.5), "fast": (3.5, 4.5), "fastest": (4.5, 5.5)}
+FIXED_SPEEDS = {"power_up": 2.0, "obstacle": 2, "skull": 2}
+# Cattle that bounced off the cowboy run back at this multiple of their speed
+BOUNCE = 5
+# Furthest anything moves right in one tick: bouncing cattle at top speed
+MAX_BOUNCE_STEP = BOUNCE * max(high for _, high in SPEED_RANGES.values())
+
+
+# Anything that runs right to left across the lanes; kind picks its behaviour
+class Entity:
+    __slots__ = ("kind", "x", "y", "width", "height", "speed", "base_speed", "points",
+                 "frame_index", "frame_timer", "hit_cowboy", "slot")
+
+    def __init__(self, kind, y, speed):
+        self.slot = -1  # index in the EntityStore holding it
+        self.reset(kind, y, speed)
+
+    def reset(self, kind, y, speed):
+        # Everything a fresh entity at the right edge starts with
+        self.kind = kind
+        self.x = WIDTH
+        self.y = y
+        self.width, self.height = KIND_SIZE[kind]
+        self.speed = self.base_speed = speed
+        self.points = KIND_POINTS.get(kind, 0)
+        self.frame_index = 0
+        self.frame_timer = 0
+        self.hit_cowboy = False
+
+
+# Recycled entities of one kind. Entities are reset in place on acquire,
+# so steady play allocates nothing; high_water is the most ever in use at
+# once, which is what the pool should be sized to.
+class EntityPool:
+    def __init__(self, kind, size=len(LANES)):
+        self.kind = kind
+        self.free = [Entity(kind, -100, 0) for _ in range(size)]
+        self.created = size
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self, y, speed):
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(self.kind, y, speed)
+        else:
+            entity = Entity(self.kind, y, speed)
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return entity
+
+    def release(self, entity):
+        self.in_use -= 1
+        self.free.append(entity)
+
+    def stats(self):
+        return {"in_use": self.in_use, "high_water": self.high_water,
+                "created": self.created, "free": len(self.free)}
+
+
+# Every live entity in one list. Order is not meaningful: removal moves the
+# last entity into the freed slot, so nothing is ever shifted or copied.
+class EntityStore:
+    def __init__(self):
+        self.items = []
+        self.counts = dict.fromkeys(KINDS, 0)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, entity):
+        entity.slot = len(self.items)
+        self.items.append(entity)
+        self.counts[entity.kind] += 1
+
+    def remove(self, entity):
+        last = self.items.pop()
+        if last is not entity:
+            self.items[entity.slot] = last
+            last.slot = entity.slot
+        entity.slot = -1
+        self.counts[entity.kind] -= 1
+
+    def clear(self):
+        self.items.clear()
+        for kind in self.counts:
+            self.counts[kind] = 0
+
+    def cattle_count(self):
+        counts = self.counts
+        return counts["slow"] + counts["fast"] + counts["fastest"]
+
+
+# Bumped whenever Game.snapshot() changes shape
+SNAPSHOT_VERSION = 2
+
+# Player attributes that change during play, in snapshot order
+PLAYER_STATE = ("y", "lassolength", "lasso_active", "frame_index", "frame_timer",
+                "touch_start_pos", "is_dragging")
+# Entity attributes a snapshot keeps; the rest follow from the kind
+ENTITY_STATE = ("kind", "x", "y", "speed", "base_speed", "frame_index", "frame_timer", "hit_cowboy")
+# Game attributes that are plain values
+GAME_STATE = ("high_score", "seed", "start_score", "hit_sound_interval", "score", "lives",
+              "spawn_timer", "obstacle_spawn_timer", "hit_sound_timer", "play_time",
+              "difficulty", "power_up_active", "last_skull_score")
+
+# Causes of a lost life, counted in Game.lives_lost
+CAUSE_ESCAPED = "escaped"
+CAUSE_OBSTACLE = "obstacle"
+CAUSE_SKULL = "skull"
+
+
+# One play session, advanced one 60 Hz frame at a time.
+#
+# With tick_scale=N each step() covers N frames: timers advance by N, the
+# cowboy and lasso still move frame by frame, but entities move N frames at
+# once and the lasso and the cowboy are tested against them with swept
+# collision (swept.py) over every frame of the step, so nothing slips past
+# between checks. tick_scale=2 is a 30 Hz mode for slow devices and cheaper
+# headless runs; it plays like the 60 Hz game but is not tick-for-tick
+# identical, as spawns and hits land on step boundaries.
+class Game:
+    def __init__(self, high_score=0, seed=None, max_cattle=MAX_CATTLE, milestones=POWER_UP_MILESTONES,
+                 skull_step=SKULL_SCORE_STEP, obstacle_interval=OBSTACLE_SPAWN_INTERVAL,
+                 start_difficulty=1.0, max_difficulty=2.5, difficulty_step=0.01, lane_gap=None,
+                 tick_scale=1):
+        if tick_scale < 1:
+            raise ValueError(f"tick_scale must be at least 1, got {tick_scale}")
+        self.high_score = high_score
+        self.max_cattle = max_cattle
+        self.milestones = milestones
+        self.skull_step = skull_step
+        self.obstacle_interval = obstacle_interval
+        self.start_difficulty = start_difficulty
+        self.max_difficulty = max_difficulty
+        self.difficulty_step = difficulty_step
+        self.lane_gap = lane_gap  # None: a lane stays taken for its owner's whole trip
+        self.tick_scale = tick_scale  # frames per step
+        self.events = []
+        # (y, lassolength) of the player after touches and after each frame of the step
+        self.player_path = []
+        # Per-kind behaviour: how it moves, what happens when the lasso
+        # catches it or it reaches the cowboy, and when it leaves at the left
+        cattle = (self.move_cattle, self.catch_cattle, self.hit_cattle, self.exit_cattle)
+        self.behaviours = {
+            "slow": cattle,
+            "fast": cattle,
+            "fastest": cattle,
+            "power_up": (self.move_power_up, self.catch_power_up, None, self.exit_power_up),
+            "obstacle": (self.move_obstacle, None, self.hit_obstacle, self.exit_obstacle),
+            "skull": (self.move_skull, None, self.hit_skull, self.exit_skull),
+        }
+        self.movers = {kind: b[0] for kind, b in self.behaviours.items()}
+        self.catchers = {kind: b[1] for kind, b in self.behaviours.items() if b[1]}
+        self.hitters = {kind: b[2] for kind, b in self.behaviours.items() if b[2]}
+        self.exiters = {kind: b[3] for kind, b in self.behaviours.items()}
+        # Entities live in the store while on screen and in their kind's pool otherwise
+        self.pools = {kind: EntityPool(kind) for kind in KINDS}
+        self.store = EntityStore()
+        self.lanes = LaneAllocator(LANES, WIDTH, lane_gap)
+        self.index = LaneIndex(LANES, max(height for _, height in KIND_SIZE.values()))
+        self.reset(seed=seed)
+
+    def settings(self):
+        # Keyword arguments that rebuild a Game with the same rules
+        return {
+            "max_cattle": self.max_cattle,
+            "milestones": list(self.milestones),  # keeps the checking order
+            "skull_step": self.skull_step,
+            "obstacle_interval": self.obstacle_interval,
+            "start_difficulty": self.start_difficulty,
+            "max_difficulty": self.max_difficulty,
+            "difficulty_step": self.difficulty_step,
+            "lane_gap": self.lane_gap,
+            "tick_scale": self.tick_scale,
+        }
+
+    def reset(self, score=0, seed=None):
+        # Everything a restart puts back; only the high score carries over.
+        # Each session draws from its own RNG, so (seed, inputs) replays it.
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.start_score = score
+        self.hit_sound_interval = self.rng.randint(120, 240)
+        self.player = Player()
+        for entity in self.store.items:
+            self.pools[entity.kind].release(entity)
+        self.store.clear()
+        self.lanes.reset()
+        self.index.clear()
+        self.score = score
+        self.lives = START_LIVES
+        self.spawn_timer = 0
+        self.obstacle_spawn_timer = 0
+        self.hit_sound_timer = 0
+        self.play_time = 0
+        self.difficulty = self.start_difficulty
+        self.spawned_milestones = set()
+        self.power_up_active = False
+        self.last_skull_score = 0
+        self.lives_lost = {CAUSE_ESCAPED: 0, CAUSE_OBSTACLE: 0, CAUSE_SKULL: 0}
+        self.caught = dict.fromkeys(LASSO_TARGETS, 0)  # lassoed this session, by kind
+
+    @property
+    def over(self):
+        return self.lives <= 0
+
+    def entities(self):
+        # The live list itself, in no particular order; do not modify it
+        return self.store.items
+
+    def digest(self):
+        # CRC32 of the state that decides future ticks, for replay divergence checks
+        player = self.player
+        values = [self.score, self.lives, self.play_time, self.difficulty, self.spawn_timer,
+                  self.obstacle_spawn_timer, self.hit_sound_timer, self.hit_sound_interval,
+                  self.last_skull_score, len(self.spawned_milestones), player.y,
+                  player.lassolength, player.lasso_active]
+        # Store order is arbitrary; lane then x is not
+        for entity in sorted(self.store.items, key=lambda e: (e.y, e.x)):
+            values += (KIND_CODES[entity.kind], entity.x, entity.y, entity.speed, entity.hit_cowboy)
+        return zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+
+    def snapshot(self):
+        # Everything that decides future ticks, as plain lists, dicts and
+        # numbers (JSON-safe). restore() on a Game with the same settings
+        # continues exactly as this one would. Entities are listed in store
+        # order; lane owners and index buckets refer to them by position.
+        player = self.player
+        items = self.store.items
+        lanes = self.lanes
+        version, state, gauss = self.rng.getstate()
+        return {
+            "version": SNAPSHOT_VERSION,
+            "settings": self.settings(),
+            "game": [getattr(self, name) for name in GAME_STATE],
+            "spawned_milestones": sorted(self.spawned_milestones),
+            "lives_lost": dict(self.lives_lost),
+            "caught": dict(self.caught),
+            "rng": [version, list(state), gauss],
+            "player": [getattr(player, name) for name in PLAYER_STATE],
+            "entities": [[getattr(entity, name) for name in ENTITY_STATE] for entity in items],
+            "lanes": [lanes.mask, [-1 if owner is None else owner.slot for owner in lanes.owners],
+                      lanes.claims, lanes.failed, lanes.early_releases],
+            "index": [[entity.slot for entity in bucket] for bucket in self.index.buckets],
+        }
+
+    def restore(self, snapshot):
+        if snapshot["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"snapshot version {snapshot['version']}, expected {SNAPSHOT_VERSION}")
+        for name, value in zip(GAME_STATE, snapshot["game"]):
+            setattr(self, name, value)
+        self.spawned_milestones = set(snapshot["spawned_milestones"])
+        self.lives_lost = dict(snapshot["lives_lost"])
+        self.caught = dict(snapshot["caught"])
+        version, state, gauss = snapshot["rng"]
+        self.rng.setstate((version, tuple(state), gauss))
+        player = self.player = Player()
+        for name, value in zip(PLAYER_STATE, snapshot["player"]):
+            setattr(player, name, value)
+        if player.touch_start_pos is not None:
+            player.touch_start_pos = tuple(player.touch_start_pos)
+
+        # Entities back to their pools, then out again in the saved order
+        for entity in self.store.items:
+            self.pools[entity.kind].release(entity)
+        self.store.clear()
+        items = self.store.items
+        for values in snapshot["entities"]:
+            kind, x, y, speed, base_speed, frame_index, frame_timer, hit_cowboy = values
+            entity = self.pools[kind].acquire(y, base_speed)
+            entity.x, entity.speed = x, speed
+            entity.frame_index, entity.frame_timer, entity.hit_cowboy = frame_index, frame_timer, hit_cowboy
+            self.store.add(entity)
+        lanes = self.lanes
+        lanes.reset()
+        mask, owners, lanes.claims, lanes.failed, lanes.early_releases = snapshot["lanes"]
+        lanes.mask = mask
+        lanes.owners = [None if slot < 0 else items[slot] for slot in owners]
+        index = self.index
+        index.clear()
+        for bucket, slots in zip(index.buckets, snapshot["index"]):
+            bucket.extend(items[slot] for slot in slots)
+            if len(bucket) > 1:
+                index.crowded += 1
+        self.events = []
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        game = cls(**snapshot["settings"])
+        game.restore(snapshot)
+        return game
+
+    def fork(self):
+        # An independent copy at this tick, e.g. to try inputs ahead
+        return self.from_snapshot(self.snapshot())
+
+    def step(self, inputs=NO_INPUT):
+        # Each phase is a method so tools (see profiler.py) can wrap them on
+        # one instance without slowing down every other game
+        self.events = []
+        self.spawn()
+        self.update_player(inputs)
+        self.update_entities()
+        return self.events
+
+    def add_entity(self, kind):
+        # Claims a lane at the right edge; returns None when every lane is taken.
+        # Cattle draw their speed even then, which keeps the RNG sequence.
+        rng = self.rng
+        y = self.lanes.claim(rng)
+        speed_range = SPEED_RANGES.get(kind)
+        speed = rng.uniform(*speed_range) if speed_range else FIXED_SPEEDS[kind]
+        if y < 0:
+            return None
+        entity = self.pools[kind].acquire(y, speed)
+        self.place(entity)
+        return entity
+
+    def place(self, entity):
+        # Puts an entity from one of the pools into play in its lane
+        self.store.add(entity)
+        self.lanes.take(entity)
+        self.index.add(entity)
+
+    def remove_entity(self, entity):
+        self.lanes.release(entity)
+        self.index.remove(entity)
+        self.store.remove(entity)
+        self.pools[entity.kind].release(entity)
+
+    def pool_stats(self):
+        return {kind: pool.stats() for kind, pool in self.pools.items()}
+
+    def spawn(self):
+        # Frame timers, spawning and the ambient hit sound
+        events = self.events
+        store = self.store
+        ticks = self.tick_scale
+        self.lanes.refresh()
+        self.play_time += ticks
+        play_time = self.play_time
+
+        self.spawn_timer += ticks
+        spawn_rate = max(30, int(60 / self.difficulty))
+        if self.spawn_timer >= spawn_rate and store.cattle_count() < self.max_cattle:
+            roll = self.rng.random()
+            if self.score >= 400:
+                fastest_chance = min(0.3, 0.1 + 0.2 * (play_time - 1800) / 1800) if play_time > 1800 else 0.1
+                if roll < fastest_chance:
+                    self.add_entity("fastest")
+                elif roll < fastest_chance + 0.4:
+                    self.add_entity("fast")
+                else:
+                    self.add_entity("slow")
+            else:
+                fast_chance = min(0.4, 0.4 * max(0, play_time - 900) / 900) if play_time > 900 else 0.0
+                self.add_entity("fast" if roll < fast_chance else "slow")
+            self.spawn_timer = 0
+            self.difficulty = min(self.difficulty + self.difficulty_step, self.max_difficulty)
+
+        for milestone in self.milestones:
+            if self.score >= milestone and milestone not in self.spawned_milestones:
+                if self.add_entity("power_up"):
+                    self.spawned_milestones.add(milestone)
+                    self.power_up_active = True
+                    events.append(SOUND_HIT_STOP)
+
+        self.obstacle_spawn_timer += ticks
+        if self.obstacle_spawn_timer >= self.obstacle_interval:
+            self.add_entity("obstacle")
+            self.obstacle_spawn_timer = 0
+
+        if (self.score >= self.last_skull_score + self.skull_step
+                and not any(e.kind == "skull" and e.x > WIDTH - 100 for e in store.items)):
+            if self.add_entity("skull"):
+                self.last_skull_score = self.score
+
+        if store.cattle_count() > 0 and not self.power_up_active:
+            self.hit_sound_timer += ticks
+            if self.hit_sound_timer >= self.hit_sound_interval:
+                events.append(SOUND_HIT)
+                self.hit_sound_interval = self.rng.randint(120, 240)
+                self.hit_sound_timer = 0
+
+    def update_player(self, inputs):
+        # Touches are applied before the keys, as they arrive before the frame
+        player = self.player
+        for phase, pos in inputs.touches:
+            if phase == TOUCH_DOWN:
+                player.handle_touch_down(pos)
+            elif phase == TOUCH_MOVE:
+                player.handle_touch_move(pos)
+            elif phase == TOUCH_UP and player.handle_touch_up(pos):
+                self.events.append(SOUND_LASSO)
+        if self.tick_scale == 1:
+            if player.move(inputs):
+                self.events.append(SOUND_LASSO)
+            return
+        # Held keys act on every frame of the step, as they would at 60 Hz
+        path = self.player_path
+        path.clear()
+        path.append((player.y, player.lassolength))
+        for _ in range(self.tick_scale):
+            if player.move(inputs):
+                self.events.append(SOUND_LASSO)
+            path.append((player.y, player.lassolength))
+
+    def update_entities(self):
+        # Move everything, then test the lasso and the cowboy only against
+        # entities in the lanes they cross, then retire what left the screen.
+        # Each entity's outcome depends only on itself and the player, so
+        # this gives the same results as testing entity by entity.
+        if self.tick_scale > 1:
+            return self.sweep_entities()
+        items = self.store.items
+        movers = self.movers
+        for entity in items:
+            movers[entity.kind](entity, 1)
+        index = self.index
+        index.sort()
+
+        player = self.player
+        if player.lassolength > 0:
+            start, end = player.lasso_start(), player.lasso_end()
+            catchers = self.catchers
+            # clipline truncates to whole pixels, so a rect can only be hit
+            # if its truncated left edge is at most the segment's end x
+            for entity in index.query(start[1], int(end[1]) + 1, end[0] + 1):
+                catch = catchers.get(entity.kind)
+                if catch and clipline_hits(entity.x, entity.y, entity.width, entity.height, start, end):
+                    catch(entity)
+
+        hitters = self.hitters
+        for entity in index.query(player.y, player.y + player.height, player.x + player.width):
+            hit = hitters.get(entity.kind)
+            if hit:
+                hit(entity)
+        self.exit_entities()
+
+    def exit_entities(self):
+        # Last to first: a removal swaps the last entity into the freed
+        # slot, and that one has been checked already
+        items = self.store.items
+        exiters = self.exiters
+        for i in range(len(items) - 1, -1, -1):
+            entity = items[i]
+            if entity.x < 0:
+                exiters[entity.kind](entity)
+
+    def sweep_entities(self):
+        # update_entities for tick_scale > 1: move everything the whole step,
+        # then replay the step frame by frame against the player's path,
+        # finding when each entity first met the lasso or the cowboy
+        ticks = self.tick_scale
+        movers = self.movers
+        for entity in self.store.items:
+            movers[entity.kind](entity, ticks)
+        self.index.sort()
+        path = self.player_path
+        for tick in range(ticks):
+            y0, length0 = path[tick]
+            y1, length1 = path[tick + 1]
+            if length1 > 0:
+                self.sweep_lasso(tick, y0, length0, y1, length1)
+            self.sweep_cowboy(tick, y0, y1)
+        self.exit_entities()
+
+    def sweep_lasso(self, tick, y0, length0, y1, length1):
+        # Lasso from its state after frame tick to the next one; a lasso
+        # thrown this frame grows out of its origin
+        ticks = self.tick_scale
+        x = self.player.x
+        start0 = (x + LASSO_ORIGIN[0], y0 + LASSO_ORIGIN[1])
+        start1 = (x + LASSO_ORIGIN[0], y1 + LASSO_ORIGIN[1])
+        if length0 > 0:
+            end0 = (x + LASSO_END[length0][0], y0 + LASSO_END[length0][1])
+        else:
+            end0 = start0
+        end1 = (x + LASSO_END[length1][0], y1 + LASSO_END[length1][1])
+        dstart = (0, start1[1] - start0[1])
+        dend = (end1[0] - end0[0], end1[1] - end0[1])
+        # Entities moving left were furthest right at the end of the step;
+        # bouncing cattle were up to MAX_BOUNCE_STEP a frame further left
+        right = max(end0[0], end1[0]) + 1 + MAX_BOUNCE_STEP * ticks
+        top = min(start0[1], start1[1])
+        bottom = int(max(end0[1], end1[1])) + 1
+        catchers = self.catchers
+        for entity in self.index.query(top, bottom, right):
+            catch = catchers.get(entity.kind)
+            if not catch:
+                continue
+            velocity = self.velocity(entity)
+            box = (entity.x - velocity * (ticks - tick), entity.y, entity.width, entity.height)
+            if sweep_segment_box(start0, dstart, end0, dend, box, (velocity, 0)) is not None:
+                catch(entity)
+
+    def sweep_cowboy(self, tick, y0, y1):
+        # The cowboy from his position after frame tick to the next one
+        ticks = self.tick_scale
+        player = self.player
+        front = player.x + player.width
+        for entity in self.index.query(min(y0, y1), max(y0, y1) + player.height, front):
+            kind = entity.kind
+            if kind in CATTLE_KINDS:
+                if entity.hit_cowboy:
+                    continue
+                # Cattle bounce anywhere left of his front, so test against
+                # a box reaching back past the left edge of the screen
+                left, width = front - 2 * WIDTH, 2 * WIDTH
+            elif kind in self.hitters:
+                left, width = player.x, player.width
+            else:
+                continue
+            velocity = self.velocity(entity)
+            x0 = entity.x - velocity * (ticks - tick)
+            when = sweep_boxes(x0, entity.y, entity.width, entity.height, velocity, 0,
+                               left, y0, width, player.height, 0, y1 - y0)
+            if when is None:
+                continue
+            if kind in CATTLE_KINDS:
+                # Run back from the moment of impact for the rest of the step
+                entity.hit_cowboy = True
+                entity.x = x0 + velocity * when + entity.speed * BOUNCE * (ticks - tick - when)
+            else:
+                self.crash(entity, CAUSE_OBSTACLE if kind == "obstacle" else CAUSE_SKULL)
+
+    def velocity(self, entity):
+        # x change per frame
+        return entity.speed * BOUNCE if entity.hit_cowboy else -entity.speed
+
+    def move_cattle(self, cattle, ticks):
+        if cattle.hit_cowboy:
+            cattle.x += cattle.speed * BOUNCE * ticks
+            if cattle.x >= WIDTH:
+                cattle.speed = cattle.base_speed
+                cattle.hit_cowboy = False
+        else:
+            cattle.x -= cattle.speed * ticks
+        if cattle.speed > 0:
+            cattle.frame_timer += ticks
+            frame_rate = 10 if cattle.speed < 3 else 7
+            if cattle.frame_timer >= frame_rate:
+                cattle.frame_timer = 0
+                cattle.frame_index = (cattle.frame_index + 1) % 2
+
+    def catch_cattle(self, cattle):
+        self.caught[cattle.kind] += 1
+        self.score += cattle.points
+        self.high_score = max(self.high_score, self.score)
+        self.remove_entity(cattle)
+        self.events.append(SOUND_POINT)
+
+    def hit_cattle(self, cattle):
+        # Anywhere left of the cowboy's front in his rows, cattle bounce off
+        player = self.player
+        if (cattle.y < player.y + player.height and
+            cattle.y + cattle.height > player.y and
+            not cattle.hit_cowboy):
+            cattle.hit_cowboy = True
+
+    def exit_cattle(self, cattle):
+        if not cattle.hit_cowboy:
+            self.lives -= 1
+            self.lives_lost[CAUSE_ESCAPED] += 1
+            self.remove_entity(cattle)
+            self.events.append(SOUND_HIT)
+
+    def move_power_up(self, power_up, ticks):
+        power_up.x -= power_up.speed * ticks
+
+    def catch_power_up(self, power_up):
+        self.caught["power_up"] += 1
+        self.lives += 1
+        self.remove_power_up(power_up)
+        self.events.append(SOUND_YEHA)
+
+    def exit_power_up(self, power_up):
+        if power_up.x < -power_up.width:
+            self.remove_power_up(power_up)
+
+    def remove_power_up(self, power_up):
+        self.remove_entity(power_up)
+        if not self.store.counts["power_up"]:
+            self.power_up_active = False
+
+    def move_obstacle(self, obstacle, ticks):
+        obstacle.x -= obstacle.speed * ticks
+        obstacle.frame_timer += ticks
+        if obstacle.frame_timer >= 10:
+            obstacle.frame_timer = 0
+            obstacle.frame_index = (obstacle.frame_index + 1) % 3
+
+    def hit_obstacle(self, obstacle):
+        if self.touches_player(obstacle):
+            self.crash(obstacle, CAUSE_OBSTACLE)
+
+    def exit_obstacle(self, obstacle):
+        if obstacle.x < -obstacle.width:
+            self.remove_entity(obstacle)
+
+    def move_skull(self, skull, ticks):
+        skull.x -= skull.speed * ticks
+
+    def hit_skull(self, skull):
+        if self.touches_player(skull):
+            self.crash(skull, CAUSE_SKULL)
+
+    def crash(self, entity, cause):
+        # An obstacle or skull ran into the cowboy
+        self.lives -= 1
+        self.lives_lost[cause] += 1
+        self.remove_entity(entity)
+        if not self.power_up_active:
+            self.events.append(SOUND_HIT)
+
+    def exit_skull(self, skull):
+        if skull.x < -skull.width:
+            self.remove_entity(skull)
+
+    def touches_player(self, entity):
+        player = self.player
+        return (entity.x < player.x + player.width and
+                entity.x + entity.width > player.x and
+                entity.y < player.y + player.height and
+                entity.y + entity.height > player.y)
+
+
+# Scripted player for bots and sweeps: line up with the nearest
+# lassoable target and throw
+def chase_policy(game):
+    player = game.player
+    targets = [e for e in game.entities()
+               if e.kind in LASSO_TARGETS and not e.hit_cowboy and e.x > player.x + player.width]
+    if not targets:
+        return NO_INPUT
+    # Ties go to the upper lane, whatever order the store holds them in
+    target = min(targets, key=lambda e: (e.x, e.y))
+    # Aim the middle of the lasso's sweep at the middle of the target lane
+    aim = player.y + 25
+    want = target.y + 30
+    return Inputs(aim > want + 5, aim < want - 5, abs(aim - want) < 40)
+
+
+# What dodge_policy steers around, and how far ahead of the cowboy's front
+# it looks: hazards within DODGE_AHEAD pixels rule out a position, and those
+# within DODGE_NEAR also block moving across their lane
+HAZARDS = ("obstacle", "skull")
+DODGE_AHEAD = 120
+DODGE_NEAR = 30
+
+
+def _clear_of(y, height, bands):
+    return all(y + height <= top or y >= bottom for top, bottom in bands)
+
+
+# Scripted player for sweeps: chase_policy's target, but it only goes where
+# no obstacle or skull is coming, and never across one about to arrive
+def dodge_policy(game):
+    player = game.player
+    front = player.x + player.width
+    height = player.height
+    ahead, near = [], []
+    targets = []
+    for e in game.entities():
+        if e.kind in HAZARDS:
+            if e.x + e.width > player.x and e.x < front + DODGE_AHEAD:
+                ahead.append((e.y, e.y + e.height))
+                if e.x < front + DODGE_NEAR:
+                    near.append(ahead[-1])
+        elif e.kind in LASSO_TARGETS and not e.hit_cowboy and e.x > front:
+            targets.append(e)
+    target = min(targets, key=lambda e: (e.x, e.y)) if targets else None
+
+    # How far the cowboy can go either way without crossing a near hazard
+    top, bottom = TOP_LIMIT, BOTTOM_LIMIT - height
+    low = high = player.y
+    while low - player.speed >= top and _clear_of(low - player.speed, height, near):
+        low -= player.speed
+    while high + player.speed <= bottom and _clear_of(high + player.speed, height, near):
+        high += player.speed
+    # Positions a whole number of steps away, so the cowboy stops on them
+    step = player.speed * game.tick_scale
+    reachable = {max(top, min(bottom, player.y + k * step))
+                 for k in range(-((bottom - top) // step) - 1, (bottom - top) // step + 2)}
+    options = [y for y in reachable if low <= y <= high and _clear_of(y, height, ahead)]
+    if not options:
+        options = [y for y in reachable if _clear_of(y, height, near)] or [player.y]
+    # Aim the middle of the lasso's sweep at the middle of the target lane
+    want = target.y + 5 if target else player.y
+    goal = min(options, key=lambda y: (abs(y - want), abs(y - player.y)))
+    aim = player.y + 25
+    return Inputs(goal < player.y, goal > player.y,
+                  target is not None and abs(aim - (target.y + 30)) < 40)
+
+
+# Drive a game with no display until it ends or max_ticks have run.
+# policy(game) returns the Inputs for the next step. Ticks are 60 Hz
+# frames, so a step counts tick_scale of them.
+def run(game, policy=None, max_ticks=None):
+    ticks = 0
+    while not game.over and (max_ticks is None or ticks < max_ticks):
+        game.step(policy(game) if policy else NO_INPUT)
+        ticks += game.tick_scale
+    return ticks
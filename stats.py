@@ -0,0 +1,22 @@
+"""Percentiles, defined once for every report.
+
+All of Stampede's reports use the nearest-rank percentile: the p-th
+percentile of n sorted values is the one at 1-based rank ceil(p / 100 * n),
+so it is always one of the values and p=100 is the largest. sweep.py and
+profiler.py index a sorted list with it, and leaderboard.py uses the same
+rank as an OFFSET into its score index.
+"""
+import math
+
+
+def nearest_rank(n, p):
+    # 0-based index of the p-th percentile of n sorted values (n > 0).
+    # Rounded first so that, e.g., p=99.9 of 1000 values is rank 999, not 1000.
+    return min(n - 1, max(0, math.ceil(round(p * n / 100, 9)) - 1))
+
+
+def percentile(sorted_values, p):
+    # p-th percentile of an already sorted list, 0 when it is empty
+    if not sorted_values:
+        return 0
+    return sorted_values[nearest_rank(len(sorted_values), p)]
@@ -0,0 +1,174 @@
+"""Parameter sweeps over headless Stampede sessions.
+
+    python sweep.py --sessions 500 --max-cattle 6 8 10 --skull-step 200 250
+
+Every combination of the given settings plays the same seeded sessions
+(so settings are compared on identical spawn luck) with a scripted policy.
+The sessions are spread over a process pool, one chunk of seeds per task,
+and the outcomes of each combination are reduced into one report: score
+distribution, survival ticks, lives lost by cause and how often each
+power-up milestone was reached and spawned, plus the entity pools' high water.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import simulation
+from stats import percentile
+
+POLICIES = {
+    "idle": None,
+    "chase": simulation.chase_policy,
+    "dodge": simulation.dodge_policy,
+}
+
+# Game keyword arguments a sweep can vary, with their value parsers
+SETTINGS = {
+    "max_cattle": int,
+    "skull_step": int,
+    "obstacle_interval": int,
+    "start_difficulty": float,
+    "max_difficulty": float,
+    "difficulty_step": float,
+    "milestones": lambda value: tuple(int(m) for m in value.split(",") if m),
+    "lane_gap": int,
+    "tick_scale": int,
+}
+
+CAUSES = (simulation.CAUSE_ESCAPED, simulation.CAUSE_OBSTACLE, simulation.CAUSE_SKULL)
+
+
+def play_sessions(settings, seeds, policy_name, max_ticks):
+    # Runs in a worker process; returns one small record per session
+    policy = POLICIES[policy_name]
+    records = []
+    for seed in seeds:
+        game = simulation.Game(seed=seed, **settings)
+        simulation.run(game, policy, max_ticks)
+        records.append({
+            "seed": seed,
+            "score": game.score,
+            "ticks": game.play_time,
+            "over": game.over,
+            "lives_lost": dict(game.lives_lost),
+            "spawned_milestones": sorted(game.spawned_milestones),
+            "pool_high_water": {kind: stats["high_water"] for kind, stats in game.pool_stats().items()},
+        })
+    return records
+
+
+def distribution(values):
+    values = sorted(values)
+    return {
+        "mean": sum(values) / len(values) if values else 0,
+        "min": values[0] if values else 0,
+        "p10": percentile(values, 10),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0,
+    }
+
+
+def summarize(settings, records):
+    milestones = settings.get("milestones", simulation.POWER_UP_MILESTONES)
+    n = len(records)
+    return {
+        "settings": {k: list(v) if isinstance(v, tuple) else v for k, v in settings.items()},
+        "sessions": n,
+        "finished": sum(r["over"] for r in records),
+        "score": distribution([r["score"] for r in records]),
+        "survival_ticks": distribution([r["ticks"] for r in records]),
+        "lives_lost_per_session": {
+            cause: sum(r["lives_lost"][cause] for r in records) / n for cause in CAUSES
+        },
+        "milestones": {
+            str(m): {
+                "reached": sum(r["score"] >= m for r in records) / n,
+                "spawned": sum(m in r["spawned_milestones"] for r in records) / n,
+            }
+            for m in sorted(milestones)
+        },
+        # Most entities of each kind ever on screen at once, for sizing the pools
+        "pool_high_water": {
+            kind: max((r["pool_high_water"][kind] for r in records), default=0)
+            for kind in simulation.KINDS
+        },
+    }
+
+
+def grid(args):
+    # Every combination of the settings given on the command line
+    names = [name for name in SETTINGS if getattr(args, name) is not None]
+    values = [getattr(args, name) for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def sweep(combos, sessions, policy_name="dodge", max_ticks=60 * 60 * 10, seed=0, workers=None):
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(seed, seed + sessions))
+    # A few chunks per worker keeps every core busy without per-session IPC
+    chunk = max(1, -(-sessions // (workers * 4)))
+    records = [[] for _ in combos]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (i, pool.submit(play_sessions, settings, seeds[start:start + chunk], policy_name, max_ticks))
+            for i, settings in enumerate(combos)
+            for start in range(0, sessions, chunk)
+        ]
+        for i, future in futures:
+            records[i].extend(future.result())
+    return [summarize(settings, recs) for settings, recs in zip(combos, records)]
+
+
+def format_report(reports):
+    lines = []
+    for report in reports:
+        settings = ", ".join(f"{k}={v}" for k, v in report["settings"].items()) or "defaults"
+        score = report["score"]
+        ticks = report["survival_ticks"]
+        lost = report["lives_lost_per_session"]
+        lines.append(f"[{settings}] {report['sessions']} sessions, {report['finished']} finished")
+        lines.append(f"  score  mean {score['mean']:.1f}  p10 {score['p10']}  p50 {score['p50']}"
+                     f"  p90 {score['p90']}  max {score['max']}")
+        lines.append(f"  ticks  mean {ticks['mean']:.0f}  p50 {ticks['p50']}  p90 {ticks['p90']}")
+        lines.append("  lives lost/session  " + "  ".join(f"{c} {lost[c]:.2f}" for c in CAUSES))
+        lines.append("  milestones  " + "  ".join(
+            f"{m}: reached {v['reached']:.1%} spawned {v['spawned']:.1%}"
+            for m, v in report["milestones"].items()))
+        lines.append("  pool high water  " + "  ".join(
+            f"{kind} {n}" for kind, n in report["pool_high_water"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep game settings over headless sessions.")
+    parser.add_argument("--sessions", type=int, default=200, help="seeded sessions per combination")
+    parser.add_argument("--seed", type=int, default=0, help="first session seed")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="dodge")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 10,
+                        help="stop a session after this many ticks (default: 10 minutes)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    for name, parse in SETTINGS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=parse, nargs="+", default=None)
+    args = parser.parse_args(argv)
+
+    combos = grid(args)
+    started = time.perf_counter()
+    reports = sweep(combos, args.sessions, args.policy, args.max_ticks, args.seed, args.workers)
+    elapsed = time.perf_counter() - started
+    print(format_report(reports))
+    print(f"{len(combos) * args.sessions} sessions in {elapsed:.1f}s")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(reports, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
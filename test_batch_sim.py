@@ -0,0 +1,71 @@
+"""batch_sim against pygame's clipline and against simulation.Game."""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import batch_sim
+import simulation
+from batch_sim import EMPTY, BatchGame
+
+
+def test_clipline_matches_pygame():
+    pygame = pytest.importorskip("pygame")
+    rng = np.random.default_rng(0)
+    n = 20000
+    rx, ry = rng.integers(-50, 150, n), rng.integers(-50, 150, n)
+    w, h = rng.integers(1, 80, n), rng.integers(1, 80, n)
+    # clipline_hits takes lines going right and down, as the lasso does
+    x1, y1 = rng.integers(-100, 200, n), rng.integers(-100, 200, n)
+    x2, y2 = x1 + rng.integers(1, 200, n), y1 + rng.integers(1, 200, n)
+    hits = batch_sim.clipline_hits(rx, ry, w, h, x1, y1, x2, y2)
+    expected = [bool(pygame.Rect(*map(int, rect)).clipline((int(a), int(b)), (int(c), int(d))))
+                for rect, a, b, c, d in zip(zip(rx, ry, w, h), x1, y1, x2, y2)]
+    assert hits.tolist() == expected
+    assert 0 < hits.sum() < n
+
+
+def game_like(batch, row):
+    # A simulation.Game holding row's entities and cowboy
+    game = simulation.Game(seed=0)
+    game.player.y = int(batch.player_y[row])
+    for lane, y in enumerate(simulation.LANES):
+        kind = batch.kind[row, lane]
+        if kind != EMPTY:
+            entity = game.pools[simulation.KINDS[kind - 1]].acquire(y, float(batch.speed[row, lane]))
+            entity.x = float(batch.x[row, lane])
+            entity.hit_cowboy = bool(batch.hit_cowboy[row, lane])
+            game.place(entity)
+    return game
+
+
+def test_dodge_policy_decides_like_simulation():
+    batch = BatchGame(100, seed=2)
+    checked = 0
+    for tick in range(2000):
+        up, down, lasso = batch_sim.dodge_policy(batch)
+        if tick % 50 == 0:
+            for row in np.flatnonzero(batch.alive):
+                inputs = simulation.dodge_policy(game_like(batch, row))
+                assert (inputs.up, inputs.down, inputs.lasso) == (up[row], down[row], lasso[row])
+                checked += 1
+        batch.step(up, down, lasso)
+    assert checked > 500
+
+
+def test_results_match_simulation():
+    # Mean score after 20 seconds of play under the same policy; the engines
+    # draw different random numbers, so they agree only statistically
+    ticks = 1200
+    batch = BatchGame(1000, seed=1)
+    batch.run(batch_sim.dodge_policy, ticks)
+    batch_scores = batch.results()["score"]
+    scores = []
+    for seed in range(24):
+        game = simulation.Game(seed=seed)
+        simulation.run(game, simulation.dodge_policy, ticks)
+        scores.append(game.score)
+    scores = np.array(scores)
+    error = math.sqrt(scores.var() / len(scores) + batch_scores.var() / len(batch_scores))
+    assert abs(scores.mean() - batch_scores.mean()) < 4 * error
@@ -0,0 +1,72 @@
+"""LaneAllocator's lane picking against rng.choice, and its consistency check."""
+import random
+
+import pytest
+
+from lanes import NO_LANE, POPCOUNT, SELECT, LaneAllocator
+from simulation import LANES, WIDTH, Entity, Game, dodge_policy
+
+
+def test_select_tables():
+    for byte in range(256):
+        bits = [bit for bit in range(8) if byte & (1 << bit)]
+        assert POPCOUNT[byte] == len(bits)
+        assert SELECT[byte] == bits
+
+
+@pytest.mark.parametrize("count", (1, 8, 9, 20, 64, 200))
+def test_claim_draws_like_rng_choice(count):
+    lanes = [i * 10 for i in range(count)]
+    picks = random.Random(count)
+    for seed in range(50):
+        allocator = LaneAllocator(lanes, WIDTH)
+        allocator.mask = picks.getrandbits(count)
+        rng, reference = random.Random(seed), random.Random(seed)
+        while True:
+            free = [y for i, y in enumerate(lanes) if not allocator.mask >> i & 1]
+            y = allocator.claim(rng)
+            if not free:
+                assert y == NO_LANE
+                break
+            assert y == reference.choice(free)
+            assert rng.getstate() == reference.getstate()
+
+
+def test_nth_free_counts_from_the_top():
+    allocator = LaneAllocator(range(0, 300, 10), WIDTH)
+    allocator.mask = 0b101101 | 1 << 20
+    free = [i for i in range(30) if not allocator.mask >> i & 1]
+    assert allocator.free_count() == len(free)
+    assert [allocator.nth_free(k) for k in range(len(free))] == free
+
+
+@pytest.mark.parametrize("lane_gap", (None, 150))
+def test_no_problems_in_play(lane_gap):
+    game = Game(seed=7, lane_gap=lane_gap)
+    for _ in range(3000):
+        game.step(dodge_policy(game))
+        assert game.lanes.problems(game.entities()) == []
+        if game.over:
+            break
+    assert game.lanes.claims
+
+
+def test_problems_are_reported():
+    allocator = LaneAllocator(LANES, WIDTH)
+    cattle = Entity("slow", LANES[1], 3)
+    allocator.take(cattle)
+    assert allocator.problems([cattle]) == []
+
+    stray = Entity("fast", LANES[2], 4)
+    assert allocator.problems([cattle, stray]) == [f"fast at y={LANES[2]} does not own its lane"]
+    assert allocator.problems([]) == ["lane 1 is owned by an entity that is not in play"]
+
+    cattle.y = LANES[3]
+    assert allocator.problems([cattle]) == [f"lane 1 owner is at y={LANES[3]}, not {LANES[1]}"]
+    cattle.y = LANES[1]
+
+    allocator.mask &= ~(1 << 1)
+    allocator.mask |= 1 << 0 | 1 << len(LANES)
+    assert allocator.problems([cattle]) == ["lane 0 is taken with no owner",
+                                            "lane 1 has an owner but is free",
+                                            "bits set beyond the last lane"]
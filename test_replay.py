@@ -0,0 +1,77 @@
+"""Recording a session to a .stpl log and replaying it."""
+import pytest
+
+from replay import InputLog, InputRecorder, ReplayDivergence, replay
+from simulation import TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP, Game, Inputs, dodge_policy
+
+
+def play(game, path, ticks=2000, check_every=1):
+    # dodge_policy with a drag and a tap now and then, so the log has
+    # RUN and TOUCH records; returns the inputs and the digest of each tick
+    recorder = InputRecorder(path, game, check_every)
+    fed, digests = [], []
+    for tick in range(ticks):
+        inputs = dodge_policy(game)
+        if tick % 97 == 10:
+            inputs = Inputs(touches=[(TOUCH_DOWN, (100, 300)), (TOUCH_MOVE, (100, 200 + tick % 200))])
+        elif tick % 97 == 11:
+            inputs = Inputs(touches=[(TOUCH_UP, (100, 250))])
+        elif tick % 97 == 40:
+            inputs = Inputs(touches=[(TOUCH_DOWN, (400, 300)), (TOUCH_UP, (402, 301))])
+        game.step(inputs)
+        recorder.record(inputs, game)
+        fed.append(inputs)
+        digests.append(game.digest())
+        if game.over:
+            break
+    recorder.close()
+    return fed, digests
+
+
+@pytest.mark.parametrize("settings", ({}, {"tick_scale": 2}, {"lane_gap": 150, "max_cattle": 12}))
+def test_round_trip(tmp_path, settings):
+    path = tmp_path / "session.stpl"
+    game = Game(seed=11, **settings)
+    fed, digests = play(game, path)
+
+    log = InputLog.load(path)
+    assert log.seed == 11
+    assert log.settings == game.settings()
+    assert len(log.inputs) == len(fed)
+    for recorded, original in zip(log.inputs, fed):
+        assert (recorded.up, recorded.down, recorded.lasso) == (original.up, original.down, original.lasso)
+        assert list(recorded.touches) == list(original.touches)
+    assert log.checks == dict(enumerate(digests, 1))
+
+    replayed = replay(log)
+    assert replayed.digest() == game.digest()
+    assert (replayed.score, replayed.lives) == (game.score, game.lives)
+
+
+def test_round_trip_from_a_start_score(tmp_path):
+    path = tmp_path / "session.stpl"
+    game = Game(seed=3)
+    game.reset(400, 3)
+    play(game, path, ticks=600, check_every=60)
+    log = InputLog.load(path)
+    assert log.score == 400
+    assert sorted(log.checks) == list(range(60, 601, 60))
+    assert replay(log).digest() == game.digest()
+
+
+def test_divergence_is_reported(tmp_path):
+    path = tmp_path / "session.stpl"
+    play(Game(seed=5), path, ticks=300, check_every=100)
+    log = InputLog.load(path)
+    log.checks[200] ^= 1
+    with pytest.raises(ReplayDivergence) as error:
+        replay(log)
+    assert error.value.tick == 200
+    replay(log, check=False)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "session.stpl"
+    path.write_bytes(b"PNG\0not a log")
+    with pytest.raises(ValueError):
+        InputLog.load(path)
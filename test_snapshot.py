@@ -0,0 +1,55 @@
+"""Game snapshots through JSON and back."""
+import json
+
+import pytest
+
+from simulation import Game, dodge_policy
+
+
+def played(ticks, **settings):
+    game = Game(seed=21, **settings)
+    for _ in range(ticks):
+        game.step(dodge_policy(game))
+    return game
+
+
+@pytest.mark.parametrize("settings", ({}, {"tick_scale": 2}, {"lane_gap": 150, "max_cattle": 12}))
+@pytest.mark.parametrize("ticks", (0, 1, 500, 1500))
+def test_restore_continues_the_same(settings, ticks):
+    game = played(ticks, **settings)
+    snapshot = json.loads(json.dumps(game.snapshot()))
+    restored = Game.from_snapshot(snapshot)
+    assert restored.digest() == game.digest()
+    assert restored.snapshot() == snapshot
+    assert restored.lanes.problems(restored.entities()) == []
+    for _ in range(1000):
+        if game.over:
+            break
+        game.step(dodge_policy(game))
+        restored.step(dodge_policy(restored))
+        assert restored.digest() == game.digest()
+    assert restored.caught == game.caught
+    assert restored.lives_lost == game.lives_lost
+
+
+def test_restore_into_a_used_game():
+    snapshot = json.loads(json.dumps(played(800).snapshot()))
+    game = played(300)
+    game.restore(snapshot)
+    assert game.snapshot() == snapshot
+
+
+def test_fork_is_independent():
+    game = played(600)
+    digest = game.digest()
+    fork = game.fork()
+    for _ in range(200):
+        fork.step(dodge_policy(fork))
+    assert game.digest() == digest
+
+
+def test_rejects_other_versions():
+    snapshot = played(10).snapshot()
+    snapshot["version"] += 1
+    with pytest.raises(ValueError):
+        Game.from_snapshot(snapshot)
@@ -0,0 +1,51 @@
+"""The shared nearest-rank percentile and the reports that use it."""
+import math
+import random
+
+import pytest
+
+from leaderboard import Leaderboard
+from profiler import FrameProfiler
+from simulation import Game
+from stats import nearest_rank, percentile
+
+
+def test_nearest_rank_definition():
+    values = list(range(1, 11))
+    assert [percentile(values, p) for p in (0, 10, 15, 50, 90, 91, 99, 100)] == [1, 1, 2, 5, 9, 10, 10, 10]
+    assert percentile([], 50) == 0
+    for n in (1, 7, 100, 1000):
+        for p in (0.1, 1, 10, 29, 50, 90, 99, 99.9, 100):
+            exact = math.ceil(p * n / 100 - 1e-9) - 1
+            assert nearest_rank(n, p) == max(0, exact)
+
+
+def test_leaderboard_agrees(tmp_path):
+    board = Leaderboard(str(tmp_path / "board.db"), background=False)
+    rng = random.Random(4)
+    scores = []
+    for seed in range(57):
+        game = Game(seed=seed)
+        game.score = rng.randrange(0, 1000, 5)
+        scores.append(game.score)
+        board.record(game)
+    scores.sort()
+    try:
+        for p in (1, 10, 50, 90, 99, 100):
+            assert board.percentile(p) == percentile(scores, p)
+    finally:
+        board.close()
+
+
+@pytest.mark.parametrize("frames", (1, 10, 100))
+def test_profiler_agrees(frames):
+    rng = random.Random(frames)
+    durations = [rng.randint(5, 40) for _ in range(frames)]
+    starts = iter([sum(durations[:i]) / 1000 for i in range(frames + 1)])
+    profiler = FrameProfiler(capacity=frames + 1, clock=lambda: next(starts))
+    for _ in range(frames + 1):
+        profiler.begin_frame()
+    durations.sort()
+    summary = profiler.summary()["frame"]
+    assert summary["p50"] == pytest.approx(percentile(durations, 50))
+    assert summary["p99"] == pytest.approx(percentile(durations, 99))
@@ -0,0 +1,153 @@
+"""swept.py against brute-force sampling, and tick_scale=2 against 60 Hz."""
+import random
+
+import pytest
+
+from simulation import BOUNCE, LANES, NO_INPUT, WIDTH, Game, Inputs
+from swept import sweep_boxes, sweep_segment_box
+
+SAMPLES = 1000
+EPSILON = 1e-6
+
+
+def boxes_overlap(a, b):
+    # Interiors intersect, as in the game's own tests
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _orient(a, b, c):
+    value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (value > EPSILON) - (value < -EPSILON)
+
+
+def _on(a, b, c):
+    # c, collinear with a-b, lies within its bounding box
+    return (min(a[0], b[0]) - EPSILON <= c[0] <= max(a[0], b[0]) + EPSILON and
+            min(a[1], b[1]) - EPSILON <= c[1] <= max(a[1], b[1]) + EPSILON)
+
+
+def segments_touch(p, q, a, b):
+    o1, o2, o3, o4 = _orient(p, q, a), _orient(p, q, b), _orient(a, b, p), _orient(a, b, q)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and _on(p, q, a)) or (o2 == 0 and _on(p, q, b)) or
+            (o3 == 0 and _on(a, b, p)) or (o4 == 0 and _on(a, b, q)))
+
+
+def segment_touches_box(p, q, box):
+    # Closed segment against the closed box, without swept.py's clipper
+    x, y, w, h = box
+    for px, py in (p, q):
+        if x - EPSILON <= px <= x + w + EPSILON and y - EPSILON <= py <= y + h + EPSILON:
+            return True
+    corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    return any(segments_touch(p, q, corners[i], corners[i - 1]) for i in range(4))
+
+
+def at(point, delta, t):
+    return point[0] + delta[0] * t, point[1] + delta[1] * t
+
+
+def moved(box, delta, t):
+    return at(box, delta, t) + tuple(box[2:])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sweep_boxes_matches_sampling(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        a = (rng.randint(-100, 100), rng.randint(-100, 100), rng.randint(1, 60), rng.randint(1, 60))
+        b = (rng.randint(-100, 100), rng.randint(-100, 100), rng.randint(1, 60), rng.randint(1, 60))
+        da = (rng.randint(-150, 150), rng.choice((0, rng.randint(-150, 150))))
+        db = (rng.choice((0, rng.randint(-150, 150))), rng.randint(-150, 150))
+        when = sweep_boxes(*a, *da, *b, *db)
+        hits = [i / SAMPLES for i in range(SAMPLES + 1)
+                if boxes_overlap(moved(a, da, i / SAMPLES), moved(b, db, i / SAMPLES))]
+        if hits:
+            assert when is not None
+            assert hits[0] - 1 / SAMPLES - EPSILON <= when <= hits[0]
+        if when is not None:
+            # The boxes touch at the time of impact, if only at an edge
+            grown = (a[0] - EPSILON, a[1] - EPSILON, a[2] + 2 * EPSILON, a[3] + 2 * EPSILON)
+            assert boxes_overlap(moved(grown, da, when), moved(b, db, when))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sweep_segment_box_matches_sampling(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        p = (rng.randint(-100, 100), rng.randint(-100, 100))
+        q = (p[0] + rng.randint(-80, 80), p[1] + rng.randint(-80, 80))
+        dp = (rng.randint(-100, 100), rng.randint(-100, 100))
+        dq = rng.choice((dp, (rng.randint(-100, 100), rng.randint(-100, 100))))
+        box = (rng.randint(-100, 100), rng.randint(-100, 100), rng.randint(1, 60), rng.randint(1, 60))
+        dbox = (rng.randint(-100, 100), rng.choice((0, rng.randint(-100, 100))))
+        when = sweep_segment_box(p, dp, q, dq, box, dbox)
+        hits = [i / SAMPLES for i in range(SAMPLES + 1)
+                if segment_touches_box(at(p, dp, i / SAMPLES), at(q, dq, i / SAMPLES),
+                                       moved(box, dbox, i / SAMPLES))]
+        if hits:
+            assert when is not None
+            assert hits[0] - 1 / SAMPLES - EPSILON <= when <= hits[0] + EPSILON
+        if when is not None:
+            assert segment_touches_box(at(p, dp, when), at(q, dq, when), moved(box, dbox, when))
+
+
+def quiet_game(tick_scale):
+    # A game that spawns nothing by itself
+    return Game(seed=1, max_cattle=0, milestones=(), skull_step=10 ** 9, obstacle_interval=10 ** 9,
+                tick_scale=tick_scale)
+
+
+def put(game, kind, y, speed, x):
+    entity = game.pools[kind].acquire(y, speed)
+    entity.x = x
+    game.place(entity)
+    return entity
+
+
+def test_cowboy_bounce_starts_at_impact():
+    game = quiet_game(2)
+    player = game.player
+    front = player.x + player.width
+    # Reaches the cowboy's front 1.5 frames into the step
+    cattle = put(game, "slow", player.y, 3.0, front + 4.5)
+    game.step()
+    assert cattle.hit_cowboy
+    assert cattle.x == pytest.approx(front + 3.0 * BOUNCE * 0.5)
+
+
+@pytest.mark.parametrize("speed", (2.5, 3.7, 4.9, 5.5))
+def test_cowboy_bounce_matches_60hz(speed):
+    for offset in range(0, 40, 3):
+        games = [quiet_game(1), quiet_game(2)]
+        cattle = [put(game, "fast", game.player.y, speed, 150 + offset) for game in games]
+        # Until the first of them is back at the right edge and turns again
+        while max(c.x for c in cattle) < WIDTH - 2 * speed * BOUNCE:
+            games[0].step()
+            games[0].step()
+            games[1].step()
+            assert cattle[0].hit_cowboy == cattle[1].hit_cowboy
+            assert cattle[0].x == pytest.approx(cattle[1].x, abs=speed * (BOUNCE + 1))
+
+
+@pytest.mark.parametrize("y", LANES)
+def test_lasso_catches_match_60hz(y):
+    # clipline works in whole pixels, so 60 Hz can catch a frame sooner,
+    # which at 30 Hz can be the next step
+    for x in range(150, 420, 9):
+        for speed in (2.5, 3.3, 4.4, 5.5):
+            caught = []
+            for tick_scale in (1, 2):
+                game = quiet_game(tick_scale)
+                put(game, "fast", y, speed, x)
+                frame = None
+                for step in range(40 // tick_scale):
+                    game.step(Inputs(lasso=True) if step == 0 else NO_INPUT)
+                    if game.score and frame is None:
+                        frame = (step + 1) * tick_scale
+                caught.append(frame)
+            frame_60hz, frame_30hz = caught
+            assert (frame_60hz is None) == (frame_30hz is None)
+            if frame_60hz is not None:
+                assert frame_30hz - 2 <= frame_60hz <= frame_30hz